@@ -4,8 +4,14 @@
   var CART_STORAGE_KEY = 'vhc_local_cart_items';
   var COURSE_PROGRESS_STORAGE_KEY = 'vhc_course_progress_v1';
   var searchIndexPromise = null;
-
-  function resolveSearchIndexUrl() {
+  var SEARCH_DEBOUNCE_MS = 250;
+  var SEARCH_API_RETRY_MS = 30000;
+  // False once /api/search is missing (static host); otherwise failures only
+  // pause it until searchApiRetryAt.
+  var searchApiAvailable = true;
+  var searchApiRetryAt = 0;
+
+  function resolveRuntimeUrl(relativeUrl, fallbackUrl) {
     var script = document.currentScript;
     if (!script) {
       var scripts = document.querySelectorAll('script[src]');
@@ -17,9 +23,17 @@
       }
     }
     if (script && script.src) {
-      return new URL('../data/search-index.json', script.src).toString();
+      return new URL(relativeUrl, script.src).toString();
     }
-    return 'assets/data/search-index.json';
+    return fallbackUrl;
+  }
+
+  function resolveSearchIndexUrl() {
+    return resolveRuntimeUrl('../data/search-index.json', 'assets/data/search-index.json');
+  }
+
+  function resolveSiteUrl(path) {
+    return resolveRuntimeUrl('../../' + path, path);
   }
 
   function safeJsonParse(value, fallback) {
@@ -172,7 +186,7 @@
 
   function loadSearchIndex() {
     if (!searchIndexPromise) {
-      searchIndexPromise = fetch(resolveSearchIndexUrl(), { cache: 'no-store' })
+      searchIndexPromise = fetch(resolveSearchIndexUrl(), { cache: 'no-cache' })
         .then(function (response) {
           if (!response.ok) {
             throw new Error('Search index request failed');
@@ -189,6 +203,64 @@
     return searchIndexPromise;
   }
 
+  function searchLocally(queryTokens) {
+    return loadSearchIndex().then(function (pages) {
+      return pages
+        .map(function (entry) {
+          return {
+            entry: entry,
+            score: scoreEntry(entry, queryTokens),
+          };
+        })
+        .filter(function (item) {
+          return item.score > 0;
+        })
+        .sort(function (left, right) {
+          return right.score - left.score;
+        })
+        .slice(0, 12)
+        .map(function (item) {
+          return item.entry;
+        });
+    });
+  }
+
+  function searchPages(query, queryTokens) {
+    if (!searchApiAvailable || Date.now() < searchApiRetryAt) {
+      return searchLocally(queryTokens);
+    }
+    // The backend also matches typos and prefixes; the local index is the offline fallback.
+    return fetch(resolveSiteUrl('api/search?q=' + encodeURIComponent(query)), {
+      headers: { Accept: 'application/json' },
+    })
+      .then(function (response) {
+        if (response.status === 404) {
+          searchApiAvailable = false;
+          throw new Error('Search API not available');
+        }
+        if (!response.ok) {
+          throw new Error('Search request failed');
+        }
+        return response.json().catch(function () {
+          // A static host answering with an HTML page has no search API.
+          searchApiAvailable = false;
+          throw new Error('Unexpected search response');
+        });
+      })
+      .then(function (payload) {
+        if (!payload || !Array.isArray(payload.results)) {
+          searchApiAvailable = false;
+          throw new Error('Unexpected search response');
+        }
+        return payload.results.slice(0, 12);
+      })
+      .catch(function () {
+        // Network errors and 5xx responses are retried after a cooldown.
+        searchApiRetryAt = Date.now() + SEARCH_API_RETRY_MS;
+        return searchLocally(queryTokens);
+      });
+  }
+
   function createSearchOverlay() {
     if (document.getElementById('local-search-overlay')) {
       return document.getElementById('local-search-overlay');
@@ -218,6 +290,8 @@
     var closeButton = overlay.querySelector('.local-search-close');
     var input = overlay.querySelector('.local-search-input');
     var results = overlay.querySelector('.local-search-results');
+    var searchSequence = 0;
+    var searchTimer = null;
 
     function closeSearch() {
       overlay.hidden = true;
@@ -251,9 +325,9 @@
         var title = document.createElement('strong');
         var snippet = document.createElement('span');
 
-        link.href = item.url;
+        link.href = resolveSiteUrl(item.url);
         title.textContent = item.title;
-        snippet.textContent = formatSnippet(item.text, queryTokens);
+        snippet.textContent = formatSnippet(item.text || item.snippet, queryTokens);
 
         link.appendChild(title);
         if (snippet.textContent) {
@@ -265,41 +339,38 @@
     }
 
     function runSearch() {
+      window.clearTimeout(searchTimer);
+      searchTimer = null;
+      searchSequence += 1;
+      var sequence = searchSequence;
       var query = input.value.trim();
       if (!query) {
         results.innerHTML = '';
-        return;
+        return Promise.resolve();
       }
 
       var queryTokens = tokenize(query);
       if (!queryTokens.length) {
         results.innerHTML = '';
-        return;
+        return Promise.resolve();
       }
 
-      loadSearchIndex().then(function (pages) {
-        var matches = pages
-          .map(function (entry) {
-            return {
-              entry: entry,
-              score: scoreEntry(entry, queryTokens),
-            };
-          })
-          .filter(function (item) {
-            return item.score > 0;
-          })
-          .sort(function (left, right) {
-            return right.score - left.score;
-          })
-          .slice(0, 12)
-          .map(function (item) {
-            return item.entry;
-          });
-
-        renderResults(matches, queryTokens);
+      return searchPages(query, queryTokens).then(function (matches) {
+        // Ignore responses that arrive after a newer keystroke's search.
+        if (sequence === searchSequence) {
+          renderResults(matches, queryTokens);
+        }
       });
     }
 
+    // Search once typing pauses, so the backend sees (and logs) settled
+    // queries rather than every keystroke prefix.
+    function scheduleSearch() {
+      window.clearTimeout(searchTimer);
+      searchSequence += 1;
+      searchTimer = window.setTimeout(runSearch, SEARCH_DEBOUNCE_MS);
+    }
+
     closeButton.addEventListener('click', closeSearch);
     overlay.addEventListener('click', function (event) {
       if (event.target === overlay) {
@@ -307,13 +378,16 @@
       }
     });
 
-    input.addEventListener('input', runSearch);
+    input.addEventListener('input', scheduleSearch);
     input.addEventListener('keydown', function (event) {
       if (event.key === 'Enter') {
-        var firstLink = results.querySelector('a');
-        if (firstLink) {
-          window.location.href = firstLink.href;
-        }
+        var pending = searchTimer !== null ? runSearch() : Promise.resolve();
+        pending.then(function () {
+          var firstLink = results.querySelector('a');
+          if (firstLink) {
+            window.location.href = firstLink.href;
+          }
+        });
       }
     });
 
@@ -754,6 +828,27 @@
     initCourseCompletionTracking();
   }
 
+  function registerServiceWorker() {
+    if (!('serviceWorker' in navigator) || !window.isSecureContext) {
+      return;
+    }
+    // sw.js sits at the site root so its scope covers every page.
+    var workerUrl = resolveRuntimeUrl('../../sw.js', null);
+    if (!workerUrl) {
+      return;
+    }
+    var register = function () {
+      navigator.serviceWorker.register(workerUrl).catch(function () {
+        // Offline support is optional; the site works without it.
+      });
+    };
+    if (document.readyState === 'complete') {
+      register();
+    } else {
+      window.addEventListener('load', register);
+    }
+  }
+
   function init() {
     initMenuToggle();
     updateCartBadge();
@@ -763,6 +858,8 @@
     initLearningInteractions();
   }
 
+  registerServiceWorker();
+
   if (document.readyState === 'loading') {
     document.addEventListener('DOMContentLoaded', init);
   } else {
@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""Bundle per-page stylesheets and inline above-the-fold critical CSS.
+
+Runs after phase2_replace_runtime.py. For every page this script:
+1. Collects the `<link rel="stylesheet">` tags in `<head>` in cascade order.
+2. Concatenates them into content-hashed bundles under assets/css/bundles/,
+   rebasing relative `url(...)` references. Stylesheets every page links go
+   into one shared bundle; each run of page-specific stylesheets becomes its
+   own small bundle, in cascade order, so pages only differ by those.
+3. Inlines the rules that match the header and first page section into a
+   `<style>` block and loads the bundles asynchronously, keeping the original
+   links in a `<noscript>` fallback so the transform can be rerun.
+4. Writes assets/css/bundles/manifest.json.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+FILES = sorted([*ROOT.glob("*.html"), *ROOT.glob("courses/*.html")])
+BUNDLE_DIR = ROOT / "assets" / "css" / "bundles"
+MANIFEST_PATH = BUNDLE_DIR / "manifest.json"
+
+# Upper bound on inlined CSS per page, in bytes; rules past this load with the
+# bundle. ~14 KB keeps the inlined head within a first TCP round-trip.
+CRITICAL_CSS_BUDGET = 14 * 1024
+
+BLOCK_START = "<!-- local-css-bundle:start -->"
+BLOCK_END = "<!-- local-css-bundle:end -->"
+BLOCK_RE = re.compile(re.escape(BLOCK_START) + r".*?" + re.escape(BLOCK_END), re.DOTALL)
+NOSCRIPT_RE = re.compile(r"<noscript\b[^>]*>(.*?)</noscript>", re.IGNORECASE | re.DOTALL)
+
+LINK_RE = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+REL_RE = re.compile(r"\brel\s*=\s*([\"'])(.*?)\1", re.IGNORECASE)
+HREF_RE = re.compile(r"\bhref\s*=\s*([\"'])(.*?)\1", re.IGNORECASE)
+MEDIA_RE = re.compile(r"\bmedia\s*=\s*([\"'])(.*?)\1", re.IGNORECASE)
+
+# Next place a url() token could start; strings and comments are skipped whole.
+CSS_URL_SCAN_RE = re.compile(r"[\"']|/\*|(?<![\w-])url\(", re.IGNORECASE)
+CSS_IMPORT_RE = re.compile(
+    r"@import\s+(?:url\(\s*)?([\"']?)([^\"')\s;]+)\1\s*\)?\s*([^;]*);",
+    re.IGNORECASE,
+)
+CSS_CHARSET_RE = re.compile(r"@charset\s+[\"'][^\"']*[\"']\s*;", re.IGNORECASE)
+CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+VAR_REF_RE = re.compile(r"var\(\s*(--[\w-]+)")
+
+CLASS_ATTR_RE = re.compile(r"\bclass\s*=\s*([\"'])(.*?)\1", re.IGNORECASE | re.DOTALL)
+ID_ATTR_RE = re.compile(r"\bid\s*=\s*([\"'])(.*?)\1", re.IGNORECASE | re.DOTALL)
+TAG_NAME_RE = re.compile(r"<([a-zA-Z][a-zA-Z0-9-]*)")
+SECTION_TAG_RE = re.compile(r"<(/?)section\b", re.IGNORECASE)
+MARKUP_ATTR_RE = re.compile(r"\s([a-zA-Z][\w:-]*)\s*=\s*([\"'])(.*?)\2", re.DOTALL)
+
+ATTR_SELECTOR_RE = re.compile(r"\[\s*([\w-]+)\s*(?:([~|^$*]?=)\s*([\"']?)(.*?)\3\s*(?:[iIsS]\s*)?)?\]")
+# Selectors that only apply after user interaction don't affect first paint.
+INTERACTION_STATE_RE = re.compile(r":(?:hover|active|focus|focus-visible|focus-within|visited)\b", re.IGNORECASE)
+SELECTOR_NOISE_RE = re.compile(r"\[[^\]]*\]|\([^)]*\)|::?[a-zA-Z-]+")
+SELECTOR_TOKEN_RE = re.compile(r"([.#]?)(-?[_a-zA-Z][\w-]*)")
+
+GROUPING_AT_RULES = ("@media", "@supports", "@layer", "@container")
+ABSOLUTE_URL_PREFIXES = ("data:", "http:", "https:", "//", "/", "#", "about:")
+
+# (prelude, body): body is the raw @font-face block, a declaration list, or
+# the child rules of a grouping at-rule.
+CriticalRule = tuple[str, "str | list[str] | list[CriticalRule]"]
+
+
+def is_rebasable(url: str) -> bool:
+    return not url.lower().startswith(ABSOLUTE_URL_PREFIXES)
+
+
+def resolve_ref(source_dir: Path, ref: str) -> Path:
+    clean = ref.split("#", 1)[0].split("?", 1)[0]
+    return Path(os.path.normpath(source_dir / clean))
+
+
+def read_url_token(css: str, index: int) -> tuple[int, str, str] | None:
+    """Parse the url() argument starting at index; return (end, quote, url)."""
+    while index < len(css) and css[index].isspace():
+        index += 1
+    if index < len(css) and css[index] in "\"'":
+        quote = css[index]
+        close = skip_string(css, index)
+        url = css[index + 1:close - 1]
+        index = close
+        while index < len(css) and css[index].isspace():
+            index += 1
+    else:
+        quote = ""
+        close = css.find(")", index)
+        if close == -1:
+            return None
+        url = css[index:close].strip()
+        index = close
+    if index >= len(css) or css[index] != ")":
+        return None
+    return index + 1, quote, url
+
+
+def rebase_css(css: str, source_dir: Path, target_dir: Path) -> str:
+    parts = []
+    last = 0
+    index = 0
+    while True:
+        match = CSS_URL_SCAN_RE.search(css, index)
+        if match is None:
+            break
+        token = match.group(0)
+        if token in "\"'":
+            index = skip_string(css, match.start())
+            continue
+        if token == "/*":
+            end = css.find("*/", match.end())
+            index = len(css) if end == -1 else end + 2
+            continue
+        parsed = read_url_token(css, match.end())
+        if parsed is None:
+            index = match.end()
+            continue
+        end, quote, url = parsed
+        index = end
+        if not is_rebasable(url):
+            continue
+        suffix = url[len(url.split("#", 1)[0].split("?", 1)[0]):]
+        absolute = resolve_ref(source_dir, url)
+        rel = os.path.relpath(absolute, target_dir).replace(os.sep, "/")
+        parts.append(css[last:match.start()])
+        parts.append(f"url({quote}{rel}{suffix}{quote})")
+        last = end
+    parts.append(css[last:])
+    return "".join(parts)
+
+
+def load_css(path: Path, target_dir: Path, seen: set[Path] | None = None) -> str:
+    """Return stylesheet text with @import inlined and urls rebased to target_dir."""
+    seen = set() if seen is None else seen
+    if path in seen or not path.exists():
+        return ""
+    seen.add(path)
+
+    css = CSS_CHARSET_RE.sub("", path.read_text(encoding="utf-8", errors="ignore"))
+
+    def inline_import(match: re.Match[str]) -> str:
+        ref, media = match.group(2), match.group(3).strip()
+        if not is_rebasable(ref):
+            return match.group(0)
+        imported = load_css(resolve_ref(path.parent, ref), target_dir, seen)
+        if media:
+            return f"@media {media}{{\n{imported}\n}}"
+        return imported
+
+    css = CSS_IMPORT_RE.sub(inline_import, css)
+    return rebase_css(css, path.parent, target_dir)
+
+
+def concatenate(sources: list[str], target_dir: Path) -> str:
+    parts = []
+    for rel in sources:
+        parts.append(f"/* {rel} */\n{load_css(ROOT / rel, target_dir)}\n")
+    return "".join(parts)
+
+
+def skip_string(css: str, index: int) -> int:
+    quote = css[index]
+    index += 1
+    while index < len(css):
+        if css[index] == "\\":
+            index += 2
+            continue
+        if css[index] == quote:
+            return index + 1
+        index += 1
+    return index
+
+
+def split_rules(css: str) -> list[tuple[str, str | None]]:
+    """Split comment-free CSS into top-level (prelude, block) pairs."""
+    rules: list[tuple[str, str | None]] = []
+    depth = 0
+    start = 0
+    prelude_end = 0
+    index = 0
+    while index < len(css):
+        char = css[index]
+        if char in "\"'":
+            index = skip_string(css, index)
+            continue
+        if char == "{":
+            if depth == 0:
+                prelude_end = index
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                rules.append((css[start:prelude_end].strip(), css[prelude_end + 1:index]))
+                start = index + 1
+            elif depth < 0:
+                depth = 0
+                start = index + 1
+        elif char == ";" and depth == 0:
+            rules.append((css[start:index].strip(), None))
+            start = index + 1
+        index += 1
+    return rules
+
+
+def selector_matches(selector: str, visible: set[str]) -> bool:
+    for match in ATTR_SELECTOR_RE.finditer(selector):
+        name, operator, value = match.group(1).lower(), match.group(2), match.group(4)
+        key = f"[{name}={value}" if operator == "=" else f"[{name}"
+        if key not in visible:
+            return False
+    stripped = SELECTOR_NOISE_RE.sub(" ", ATTR_SELECTOR_RE.sub(" ", selector))
+    for match in SELECTOR_TOKEN_RE.finditer(stripped):
+        sigil, name = match.groups()
+        if sigil == ".":
+            key = name
+        elif sigil == "#":
+            key = f"#{name}"
+        else:
+            key = f"<{name.lower()}"
+        if key not in visible:
+            return False
+    return True
+
+
+def split_declarations(block: str) -> list[str]:
+    """Split a declaration block on top-level semicolons."""
+    declarations = []
+    depth = 0
+    start = 0
+    index = 0
+    while index < len(block):
+        char = block[index]
+        if char in "\"'":
+            index = skip_string(block, index)
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+        elif char == ";" and depth == 0:
+            declarations.append(block[start:index].strip())
+            start = index + 1
+        index += 1
+    declarations.append(block[start:].strip())
+    return [declaration for declaration in declarations if declaration]
+
+
+def critical_rules(css: str, visible: set[str]) -> list[CriticalRule]:
+    kept: list[CriticalRule] = []
+    for prelude, block in split_rules(css):
+        if block is None or not prelude:
+            continue
+        lowered = prelude.lower()
+        if lowered.startswith("@font-face"):
+            kept.append((prelude, block))
+        elif lowered.startswith(GROUPING_AT_RULES):
+            inner = critical_rules(block, visible)
+            if inner:
+                kept.append((prelude, inner))
+        elif not lowered.startswith("@"):
+            parts = [part for part in prelude.split(",") if not INTERACTION_STATE_RE.search(part)]
+            if any(selector_matches(part, visible) for part in parts):
+                kept.append((prelude, split_declarations(block)))
+    return kept
+
+
+def declaration_lists(rules: list[CriticalRule]) -> list[list[str]]:
+    lists = []
+    for prelude, body in rules:
+        if isinstance(body, list) and body and isinstance(body[0], tuple):
+            lists.extend(declaration_lists(body))
+        elif isinstance(body, list):
+            lists.append(body)
+    return lists
+
+
+def prune_custom_properties(rules: list[CriticalRule]) -> None:
+    """Drop custom property declarations no kept declaration can reach via var()."""
+    custom: dict[str, list[str]] = {}
+    used: set[str] = set()
+    for declarations in declaration_lists(rules):
+        for declaration in declarations:
+            name = declaration.split(":", 1)[0].strip()
+            if name.startswith("--"):
+                custom.setdefault(name, []).append(declaration)
+            else:
+                used.update(VAR_REF_RE.findall(declaration))
+    pending = list(used)
+    while pending:
+        for declaration in custom.get(pending.pop(), []):
+            for name in VAR_REF_RE.findall(declaration):
+                if name not in used:
+                    used.add(name)
+                    pending.append(name)
+    for declarations in declaration_lists(rules):
+        declarations[:] = [
+            declaration
+            for declaration in declarations
+            if not declaration.startswith("--") or declaration.split(":", 1)[0].strip() in used
+        ]
+
+
+def render_rule(rule: CriticalRule) -> str:
+    prelude, body = rule
+    if isinstance(body, str):
+        return f"{prelude}{{{body}}}"
+    if body and isinstance(body[0], tuple):
+        inner = "".join(render_rule(child) for child in body)
+        return f"{prelude}{{{inner}}}" if inner else ""
+    return f"{prelude}{{{';'.join(body)}}}" if body else ""
+
+
+def extract_critical_css(css: str, visible: set[str]) -> str:
+    rules = critical_rules(CSS_COMMENT_RE.sub("", css), visible)
+    prune_custom_properties(rules)
+    rendered = [rule for rule in map(render_rule, rules) if rule]
+    # Of identical rules only the last one can matter to the cascade.
+    last_seen = {rule: position for position, rule in enumerate(rendered)}
+    output: list[str] = []
+    size = 0
+    for position, rule in enumerate(rendered):
+        if last_seen[rule] != position:
+            continue
+        # Stop at the budget rather than skip ahead: later rules may override
+        # ones that would be left out.
+        rule_bytes = len(rule.encode("utf-8")) + (1 if output else 0)
+        if size + rule_bytes > CRITICAL_CSS_BUDGET:
+            break
+        output.append(rule)
+        size += rule_bytes
+    return "\n".join(output)
+
+
+def fold_end(text: str, body_start: int) -> int:
+    """Return where the first page section inside <main> ends (the fold)."""
+    lowered = text.lower()
+    main_start = lowered.find("<main", body_start)
+    if main_start == -1:
+        header_end = lowered.find("</header>", body_start)
+        return len(text) if header_end == -1 else header_end
+    depth = 0
+    for match in SECTION_TAG_RE.finditer(text, main_start):
+        if not match.group(1):
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    return len(text)
+
+
+def above_fold_tokens(text: str) -> set[str]:
+    """Return class names, #ids and <tags> used in the header and first section."""
+    body_start = max(text.lower().find("<body"), 0)
+    fragment = text[body_start:fold_end(text, body_start)]
+
+    visible = {"<html", "<body"}
+    for match in CLASS_ATTR_RE.finditer(fragment):
+        visible.update(match.group(2).split())
+    for match in ID_ATTR_RE.finditer(fragment):
+        visible.add(f"#{match.group(2).strip()}")
+    for match in TAG_NAME_RE.finditer(fragment):
+        visible.add(f"<{match.group(1).lower()}")
+    for match in MARKUP_ATTR_RE.finditer(fragment):
+        name = match.group(1).lower()
+        visible.update((f"[{name}", f"[{name}={match.group(3)}"))
+    return visible
+
+
+def stylesheet_links(head: str) -> list[tuple[re.Match[str], str]]:
+    links = []
+    for match in LINK_RE.finditer(head):
+        tag = match.group(0)
+        rel_match = REL_RE.search(tag)
+        href_match = HREF_RE.search(tag)
+        media_match = MEDIA_RE.search(tag)
+        if not rel_match or rel_match.group(2).strip().lower() != "stylesheet" or not href_match:
+            continue
+        if media_match and media_match.group(2).strip().lower() not in ("all", "screen"):
+            continue
+        href = href_match.group(2).strip()
+        if not is_rebasable(href):
+            continue
+        links.append((match, href))
+    return links
+
+
+def page_sources(path: Path, text: str) -> tuple[str, list[str], list[str]]:
+    """Return (text without a previous bundle block, source link tags, repo-relative hrefs)."""
+    previous = BLOCK_RE.search(text)
+    if previous:
+        noscript = NOSCRIPT_RE.search(previous.group(0))
+        fallback = noscript.group(1) if noscript else ""
+        tags = [match.group(0) for match, _ in stylesheet_links(fallback)]
+        hrefs = [href for _, href in stylesheet_links(fallback)]
+        text = text[:previous.start()] + "%%CSS_BUNDLE%%" + text[previous.end():]
+    else:
+        head_end = text.lower().find("</head>")
+        head = text[:head_end] if head_end != -1 else ""
+        links = stylesheet_links(head)
+        if not links:
+            return text, [], []
+        tags = [match.group(0) for match, _ in links]
+        hrefs = [href for _, href in links]
+        parts = []
+        last_index = 0
+        for position, (match, _) in enumerate(links):
+            if position == 0:
+                parts.append(text[last_index:match.start()])
+                parts.append("%%CSS_BUNDLE%%")
+                last_index = match.end()
+                continue
+            # Drop the whole line the link tag sat on, not just the tag.
+            line_start = text.rfind("\n", last_index, match.start()) + 1
+            if text[line_start:match.start()].strip():
+                line_start = match.start()
+            parts.append(text[last_index:line_start])
+            last_index = match.end()
+            if text.startswith("\n", last_index):
+                last_index += 1
+        parts.append(text[last_index:])
+        text = "".join(parts)
+
+    sources = [
+        resolve_ref(path.parent, href).relative_to(ROOT).as_posix()
+        for href in hrefs
+    ]
+    return text, tags, sources
+
+
+def split_runs(sources: list[str], shared: set[str]) -> list[tuple[str, ...]]:
+    """Group consecutive sources by whether every page links them."""
+    runs: list[list[str]] = []
+    for source in sources:
+        if runs and (runs[-1][0] in shared) == (source in shared):
+            runs[-1].append(source)
+        else:
+            runs.append([source])
+    return [tuple(run) for run in runs]
+
+
+def render_block(bundle_hrefs: list[str], critical_css: str, source_tags: list[str]) -> str:
+    fallback = "\n".join(f"      {tag}" for tag in source_tags)
+    preloads = "".join(
+        f'    <link rel="preload" as="style" href="{href}" '
+        "onload=\"this.onload=null;this.rel='stylesheet'\"/>\n"
+        for href in bundle_hrefs
+    )
+    return (
+        f"{BLOCK_START}\n"
+        f"    <style data-local-critical-css>\n{critical_css}\n    </style>\n"
+        f"{preloads}"
+        f"    <noscript>\n{fallback}\n    </noscript>\n"
+        f"    {BLOCK_END}"
+    )
+
+
+def write_bundle(sources: tuple[str, ...]) -> str:
+    bundle_css = concatenate(list(sources), BUNDLE_DIR)
+    digest = hashlib.sha256(bundle_css.encode("utf-8")).hexdigest()[:12]
+    bundle_path = BUNDLE_DIR / f"bundle-{digest}.css"
+    if not bundle_path.exists():
+        bundle_path.write_text(bundle_css, encoding="utf-8")
+    return bundle_path.relative_to(ROOT).as_posix()
+
+
+def main() -> None:
+    BUNDLE_DIR.mkdir(parents=True, exist_ok=True)
+    bundles: dict[tuple[str, ...], str] = {}
+    manifest: dict[str, dict] = {}
+    changed = []
+
+    pages = []
+    for path in FILES:
+        original = path.read_text(encoding="utf-8", errors="ignore")
+        text, source_tags, sources = page_sources(path, original)
+        if sources:
+            pages.append((path, original, text, source_tags, sources))
+    shared = set.intersection(*(set(page[4]) for page in pages)) if pages else set()
+
+    for path, original, text, source_tags, sources in pages:
+        page_bundles = []
+        for run in split_runs(sources, shared):
+            if run not in bundles:
+                bundles[run] = write_bundle(run)
+            page_bundles.append(bundles[run])
+
+        bundle_hrefs = [
+            os.path.relpath(ROOT / bundle_rel, path.parent).replace(os.sep, "/") for bundle_rel in page_bundles
+        ]
+        critical_css = extract_critical_css(
+            concatenate(sources, path.parent),
+            above_fold_tokens(text),
+        )
+        text = text.replace("%%CSS_BUNDLE%%", render_block(bundle_hrefs, critical_css, source_tags), 1)
+
+        rel = path.relative_to(ROOT).as_posix()
+        manifest[rel] = {
+            "bundles": page_bundles,
+            "sources": sources,
+            "critical_bytes": len(critical_css.encode("utf-8")),
+        }
+        if text != original:
+            path.write_text(text, encoding="utf-8")
+            changed.append(rel)
+
+    live = {Path(bundle_rel).name for bundle_rel in bundles.values()}
+    for stale in BUNDLE_DIR.glob("bundle-*.css"):
+        if stale.name not in live:
+            stale.unlink()
+
+    MANIFEST_PATH.write_text(json.dumps({"pages": manifest}, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    print(f"wrote {len(bundles)} bundles for {len(manifest)} pages; changed {len(changed)} files")
+    for rel in changed:
+        print(rel)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""Build the service-worker precache manifest and the service worker itself.
+
+The manifest lists every page plus the stylesheets, scripts and webfonts the
+pages load and the search index, each with a content-hash revision. The
+generated ./sw.js embeds the manifest version, so browsers install a new worker
+on deploy; it copies unchanged entries from the previous cache and downloads
+only the ones whose revision changed. Registered by assets/js/local-runtime.js.
+
+Run last, after every other build stage has rewritten its outputs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import posixpath
+import re
+from datetime import datetime, timezone
+
+from build_preload_manifest import (
+    FILES,
+    LINK_RE,
+    NOSCRIPT_RE,
+    ROOT,
+    SRC_DECL_RE,
+    SRC_ENTRY_RE,
+    attrs,
+    is_local,
+    site_path,
+    to_site_url,
+)
+
+MANIFEST_PATH = ROOT / "assets" / "data" / "precache-manifest.json"
+SERVICE_WORKER_PATH = ROOT / "sw.js"
+EXTRA_URLS = ["/assets/data/search-index.json"]
+
+SCRIPT_SRC_RE = re.compile(r"<script\b[^>]*>", re.IGNORECASE)
+FONT_FACE_RE = re.compile(r"@font-face\s*\{([^}]*)\}", re.IGNORECASE)
+# Formats every browser that supports service workers can use.
+USABLE_FONT_FORMATS = ("", "woff2", "woff", "opentype", "truetype")
+
+SERVICE_WORKER_TEMPLATE = """/* Generated by scripts/build_precache_manifest.py; do not edit. */
+'use strict';
+
+var PRECACHE_VERSION = '__PRECACHE_VERSION__';
+var MANIFEST_URL = 'assets/data/precache-manifest.json';
+var CACHE_PREFIX = 'vhc-precache-';
+var RUNTIME_CACHE = 'vhc-runtime';
+var MANIFEST_KEY = '__precache-manifest__';
+var MAX_RUNTIME_ENTRIES = 200;
+
+function precacheName(version) {
+  return CACHE_PREFIX + version;
+}
+
+function absoluteUrl(url) {
+  return new URL(url, self.location).toString();
+}
+
+function readStoredManifest(cache) {
+  return cache.match(absoluteUrl(MANIFEST_KEY)).then(function (response) {
+    return response ? response.json() : null;
+  });
+}
+
+function findPreviousPrecache(currentName) {
+  return caches.keys().then(function (names) {
+    var candidates = names.filter(function (name) {
+      return name.indexOf(CACHE_PREFIX) === 0 && name !== currentName;
+    });
+    if (!candidates.length) {
+      return null;
+    }
+    var name = candidates[candidates.length - 1];
+    return caches.open(name).then(function (cache) {
+      return readStoredManifest(cache).then(function (manifest) {
+        if (!manifest) {
+          return null;
+        }
+        var revisions = {};
+        manifest.entries.forEach(function (entry) {
+          revisions[entry.url] = entry.revision;
+        });
+        return { cache: cache, revisions: revisions };
+      });
+    });
+  });
+}
+
+function fetchInto(cache, url) {
+  return fetch(url, { cache: 'no-cache' }).then(function (response) {
+    if (!response.ok) {
+      throw new Error('Precache request failed: ' + url);
+    }
+    return cache.put(url, response);
+  });
+}
+
+function copyOrFetch(cache, previous, entry) {
+  var url = absoluteUrl(entry.url);
+  if (!previous || previous.revisions[entry.url] !== entry.revision) {
+    return fetchInto(cache, url);
+  }
+  return previous.cache.match(url).then(function (response) {
+    return response ? cache.put(url, response) : fetchInto(cache, url);
+  });
+}
+
+function installPrecache() {
+  var name = precacheName(PRECACHE_VERSION);
+  return fetch(MANIFEST_URL, { cache: 'no-cache' })
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error('Precache manifest request failed');
+      }
+      return response.json();
+    })
+    .then(function (manifest) {
+      return Promise.all([caches.open(name), findPreviousPrecache(name)]).then(function (opened) {
+        var cache = opened[0];
+        var previous = opened[1];
+        return Promise.all(
+          manifest.entries.map(function (entry) {
+            return copyOrFetch(cache, previous, entry);
+          })
+        ).then(function () {
+          var body = JSON.stringify(manifest);
+          return cache.put(absoluteUrl(MANIFEST_KEY), new Response(body, { headers: { 'Content-Type': 'application/json' } }));
+        });
+      });
+    });
+}
+
+function trimCache(cache, maxEntries) {
+  return cache.keys().then(function (keys) {
+    return Promise.all(
+      keys.slice(0, Math.max(0, keys.length - maxEntries)).map(function (key) {
+        return cache.delete(key);
+      })
+    );
+  });
+}
+
+function revalidate(cache, key, request, maxEntries) {
+  return fetch(request)
+    .then(function (response) {
+      if (!response.ok || response.type !== 'basic') {
+        return response;
+      }
+      return cache.put(key, response.clone()).then(function () {
+        return maxEntries ? trimCache(cache, maxEntries) : null;
+      }).then(function () {
+        return response;
+      });
+    })
+    .catch(function () {
+      return null;
+    });
+}
+
+function cacheKeyFor(request, url) {
+  if (request.mode !== 'navigate') {
+    return request;
+  }
+  // Ignore ?q= and similar so lessons open offline from any link.
+  var path = url.pathname.slice(-1) === '/' ? url.pathname + 'index.html' : url.pathname;
+  return url.origin + path;
+}
+
+function staleWhileRevalidate(event, request, url) {
+  var key = cacheKeyFor(request, url);
+  return caches.open(precacheName(PRECACHE_VERSION)).then(function (precache) {
+    return precache.match(key).then(function (cached) {
+      if (cached) {
+        event.waitUntil(revalidate(precache, key, request, 0));
+        return cached;
+      }
+      return caches.open(RUNTIME_CACHE).then(function (runtime) {
+        return runtime.match(key).then(function (runtimeCached) {
+          var network = revalidate(runtime, key, request, MAX_RUNTIME_ENTRIES);
+          if (runtimeCached) {
+            event.waitUntil(network);
+            return runtimeCached;
+          }
+          return network.then(function (response) {
+            return response || Response.error();
+          });
+        });
+      });
+    });
+  });
+}
+
+self.addEventListener('install', function (event) {
+  event.waitUntil(
+    installPrecache().then(function () {
+      return self.skipWaiting();
+    })
+  );
+});
+
+self.addEventListener('activate', function (event) {
+  var current = precacheName(PRECACHE_VERSION);
+  event.waitUntil(
+    caches
+      .keys()
+      .then(function (names) {
+        return Promise.all(
+          names
+            .filter(function (name) {
+              return name.indexOf(CACHE_PREFIX) === 0 && name !== current;
+            })
+            .map(function (name) {
+              return caches.delete(name);
+            })
+        );
+      })
+      .then(function () {
+        return self.clients.claim();
+      })
+  );
+});
+
+self.addEventListener('fetch', function (event) {
+  var request = event.request;
+  if (request.method !== 'GET' || request.headers.has('range')) {
+    return;
+  }
+  var url = new URL(request.url);
+  var scopePath = new URL(self.registration.scope).pathname;
+  if (url.origin !== self.location.origin || url.pathname.indexOf(scopePath + 'api/') === 0) {
+    return;
+  }
+  event.respondWith(staleWhileRevalidate(event, request, url));
+});
+"""
+
+
+def page_url(path) -> str:
+    return "/" + path.relative_to(ROOT).as_posix()
+
+
+def collect_page_assets(path) -> list[str]:
+    """Return site-absolute URLs of the stylesheets and scripts a page loads."""
+    text = path.read_text(encoding="utf-8", errors="ignore")
+    rel_dir = path.parent.relative_to(ROOT).as_posix()
+    base_url = "/" if rel_dir == "." else f"/{rel_dir}/"
+    markup = NOSCRIPT_RE.sub("", text)
+
+    urls = []
+    for match in LINK_RE.finditer(markup):
+        link = attrs(match.group(0))
+        rel = link.get("rel", "").lower()
+        if rel == "stylesheet" or (rel == "preload" and link.get("as") == "style"):
+            if is_local(link.get("href", "")):
+                urls.append(to_site_url(base_url, link["href"]))
+    for match in SCRIPT_SRC_RE.finditer(markup):
+        src = attrs(match.group(0)).get("src", "")
+        if is_local(src):
+            urls.append(to_site_url(base_url, src))
+    return urls
+
+
+def collect_font_urls(css_url: str) -> list[str]:
+    """Return the font file each @font-face rule makes a modern browser fetch."""
+    css = site_path(css_url).read_text(encoding="utf-8", errors="ignore")
+    base_url = posixpath.dirname(css_url) + "/"
+    urls = []
+    for face in FONT_FACE_RE.finditer(css):
+        declarations = SRC_DECL_RE.findall(face.group(1))
+        if not declarations:
+            continue
+        for entry in SRC_ENTRY_RE.finditer(declarations[-1]):
+            if (entry.group(4) or "").lower() in USABLE_FONT_FORMATS:
+                if is_local(entry.group(2)):
+                    urls.append(to_site_url(base_url, entry.group(2)))
+                break
+    return urls
+
+
+def revision(url: str) -> str:
+    return hashlib.sha256(site_path(url).read_bytes()).hexdigest()[:16]
+
+
+def main() -> None:
+    urls: list[str] = []
+    for path in FILES:
+        urls.append(page_url(path))
+        for asset_url in collect_page_assets(path):
+            urls.append(asset_url)
+            if asset_url.split("?", 1)[0].endswith(".css") and site_path(asset_url).exists():
+                urls.extend(collect_font_urls(asset_url))
+    urls.extend(EXTRA_URLS)
+
+    entries = []
+    for url in dict.fromkeys(urls):
+        if site_path(url).is_file():
+            # Relative to the worker's scope so the site can live under a subpath.
+            entries.append({"url": url.lstrip("/"), "revision": revision(url)})
+    entries.sort(key=lambda entry: entry["url"])
+
+    fingerprint = "\n".join(f"{entry['url']} {entry['revision']}" for entry in entries)
+    version = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+    payload = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "version": version,
+        "entries": entries,
+    }
+
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    SERVICE_WORKER_PATH.write_text(SERVICE_WORKER_TEMPLATE.replace("__PRECACHE_VERSION__", version), encoding="utf-8")
+
+    total = sum(site_path("/" + entry["url"]).stat().st_size for entry in entries)
+    print(
+        f"wrote {MANIFEST_PATH.relative_to(ROOT)} and {SERVICE_WORKER_PATH.relative_to(ROOT)} "
+        f"(version {version}, {len(entries)} entries, {total} bytes)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Record each page's critical dependencies for Link preload headers.
+
+For every page this collects the render-blocking stylesheets, the webfonts
+those stylesheets use, the first content image (the likely LCP element) and
+assets/js/local-runtime.js, and writes them to assets/data/preload-manifest.json
+as site-root-absolute URLs. scripts/local_backend.py turns the entries into
+`Link: rel=preload` headers (and optional 103 Early Hints).
+
+Run after scripts/build_css_bundles.py so bundled pages list their bundle.
+"""
+
+from __future__ import annotations
+
+import html
+import json
+import posixpath
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import unquote
+
+ROOT = Path(__file__).resolve().parents[1]
+FILES = sorted([*ROOT.glob("*.html"), *ROOT.glob("courses/*.html")])
+OUTPUT_PATH = ROOT / "assets" / "data" / "preload-manifest.json"
+RUNTIME_JS = "assets/js/local-runtime.js"
+
+# Preloading every face competes with the stylesheet itself; keep the first few.
+MAX_FONT_PRELOADS = 4
+FONT_FORMAT_PREFERENCE = ("woff2", "woff", "opentype", "truetype")
+FONT_MIME_TYPES = {
+    "woff2": "font/woff2",
+    "woff": "font/woff",
+    "opentype": "font/otf",
+    "truetype": "font/ttf",
+}
+
+NOSCRIPT_RE = re.compile(r"<noscript\b[^>]*>.*?</noscript>", re.IGNORECASE | re.DOTALL)
+STYLE_BLOCK_RE = re.compile(r"<style\b([^>]*)>(.*?)</style>", re.IGNORECASE | re.DOTALL)
+LINK_RE = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+IMG_RE = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+ATTR_RE = re.compile(r"\b([a-zA-Z-]+)\s*=\s*([\"'])(.*?)\2", re.DOTALL)
+
+FONT_FACE_RE = re.compile(r"@font-face\s*\{([^}]*)\}", re.IGNORECASE)
+FONT_FAMILY_DECL_RE = re.compile(r"font-family\s*:\s*([^;}]*)", re.IGNORECASE)
+SRC_DECL_RE = re.compile(r"\bsrc\s*:\s*([^;}]*)", re.IGNORECASE)
+SRC_ENTRY_RE = re.compile(
+    r"url\(\s*([\"']?)([^\"')]+)\1\s*\)(?:\s*format\(\s*([\"']?)([^\"')]+)\3\s*\))?",
+    re.IGNORECASE,
+)
+
+
+def attrs(tag: str) -> dict[str, str]:
+    return {match.group(1).lower(): html.unescape(match.group(3)) for match in ATTR_RE.finditer(tag)}
+
+
+def is_local(ref: str) -> bool:
+    return bool(ref) and not ref.lower().startswith(("data:", "http:", "https:", "//", "#", "about:"))
+
+
+def to_site_url(base_url: str, ref: str) -> str:
+    """Resolve `ref` against the site-absolute directory `base_url`."""
+    ref = ref.split("#", 1)[0]
+    if ref.startswith("/"):
+        return posixpath.normpath(ref)
+    return posixpath.normpath(posixpath.join(base_url, ref))
+
+
+def site_path(url: str) -> Path:
+    return ROOT / unquote(url.split("?", 1)[0]).lstrip("/")
+
+
+def family_names(value: str) -> set[str]:
+    return {name.strip().strip("\"'").lower() for name in value.split(",") if name.strip()}
+
+
+def collect_stylesheets(head: str, base_url: str) -> list[str]:
+    urls = []
+    for match in LINK_RE.finditer(NOSCRIPT_RE.sub("", head)):
+        link = attrs(match.group(0))
+        rel = link.get("rel", "").lower()
+        is_style = rel == "stylesheet" or (rel == "preload" and link.get("as") == "style")
+        if is_style and is_local(link.get("href", "")):
+            url = to_site_url(base_url, link["href"])
+            if site_path(url).exists() and url not in urls:
+                urls.append(url)
+    return urls
+
+
+def collect_fonts(css_sources: list[tuple[str, str]], used_css: str) -> list[dict[str, str]]:
+    """Return preload entries for faces whose family the page's CSS uses."""
+    used_families: set[str] = set()
+    for match in FONT_FAMILY_DECL_RE.finditer(used_css):
+        used_families |= family_names(match.group(1))
+
+    fonts: list[dict[str, str]] = []
+    for base_url, css in css_sources:
+        for face in FONT_FACE_RE.finditer(css):
+            family = FONT_FAMILY_DECL_RE.search(face.group(1))
+            src = SRC_DECL_RE.search(face.group(1))
+            if not family or not src or not family_names(family.group(1)) & used_families:
+                continue
+            candidates = {}
+            for entry in SRC_ENTRY_RE.finditer(src.group(1)):
+                fmt = (entry.group(4) or "").lower()
+                if fmt in FONT_MIME_TYPES and is_local(entry.group(2)):
+                    candidates.setdefault(fmt, to_site_url(base_url, entry.group(2)))
+            for fmt in FONT_FORMAT_PREFERENCE:
+                url = candidates.get(fmt)
+                if url and site_path(url).exists():
+                    if all(font["href"] != url for font in fonts):
+                        fonts.append({"href": url, "as": "font", "type": FONT_MIME_TYPES[fmt], "crossorigin": "anonymous"})
+                    break
+            if len(fonts) >= MAX_FONT_PRELOADS:
+                return fonts
+    return fonts
+
+
+def collect_lcp_image(text: str, base_url: str) -> dict[str, str] | None:
+    main_start = text.lower().find("<main")
+    for match in IMG_RE.finditer(text, max(main_start, 0)):
+        image = attrs(match.group(0))
+        src = image.get("src") or image.get("data-src", "")
+        if not is_local(src):
+            continue
+        url = to_site_url(base_url, src)
+        if not site_path(url).exists():
+            continue
+        entry = {"href": url, "as": "image"}
+        srcset = []
+        for candidate in image.get("srcset", "").split(","):
+            parts = candidate.split()
+            if parts and is_local(parts[0]):
+                srcset.append(" ".join([to_site_url(base_url, parts[0]), *parts[1:]]))
+        if srcset:
+            entry["imagesrcset"] = ", ".join(srcset)
+            if image.get("sizes"):
+                entry["imagesizes"] = image["sizes"]
+        return entry
+    return None
+
+
+def collect_page(path: Path) -> list[dict[str, str]]:
+    text = path.read_text(encoding="utf-8", errors="ignore")
+    head_end = text.lower().find("</head>")
+    head = text[:head_end] if head_end != -1 else ""
+    rel_dir = path.parent.relative_to(ROOT).as_posix()
+    base_url = "/" if rel_dir == "." else f"/{rel_dir}/"
+
+    stylesheets = collect_stylesheets(head, base_url)
+    entries: list[dict[str, str]] = [{"href": url, "as": "style"} for url in stylesheets]
+
+    inline_css = [block.group(2) for block in STYLE_BLOCK_RE.finditer(head)]
+    critical_css = [
+        block.group(2) for block in STYLE_BLOCK_RE.finditer(head) if "data-local-critical-css" in block.group(1)
+    ]
+    css_sources = [(base_url, css) for css in inline_css]
+    for url in stylesheets:
+        css_sources.append((posixpath.dirname(url) + "/", site_path(url).read_text(encoding="utf-8", errors="ignore")))
+    used_css = "\n".join(critical_css) if critical_css else "\n".join(css for _, css in css_sources)
+    entries.extend(collect_fonts(css_sources, used_css))
+
+    image = collect_lcp_image(text, base_url)
+    if image:
+        entries.append(image)
+
+    if (ROOT / RUNTIME_JS).exists():
+        entries.append({"href": f"/{RUNTIME_JS}", "as": "script"})
+    return entries
+
+
+def main() -> None:
+    pages = {path.relative_to(ROOT).as_posix(): collect_page(path) for path in FILES}
+    payload = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "page_count": len(pages),
+        "pages": pages,
+    }
+
+    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUTPUT_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"wrote {OUTPUT_PATH.relative_to(ROOT)} with {len(pages)} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,18 +6,28 @@ from __future__ import annotations
 import html
 import json
 import re
+import struct
+import sys
+from array import array
 from datetime import datetime, timezone
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 HTML_GLOBS = ["*.html", "courses/*.html"]
 OUTPUT_PATH = ROOT / "assets" / "data" / "search-index.json"
+# Server-side only, so kept out of the index the browser downloads.
+BINARY_PATH = ROOT / "assets" / "data" / "search-index.bin"
+BINARY_MAGIC = b"VWSI"
+BINARY_VERSION = 1
+# magic, version, doc/term/gram counts, then (offset, length) for 9 sections.
+BINARY_HEADER = struct.Struct("<4s4I18I")
 
 SCRIPT_RE = re.compile(r"<script\b[^>]*>.*?</script>", re.IGNORECASE | re.DOTALL)
 STYLE_RE = re.compile(r"<style\b[^>]*>.*?</style>", re.IGNORECASE | re.DOTALL)
 TAG_RE = re.compile(r"<[^>]+>")
 WS_RE = re.compile(r"\s+")
 TITLE_RE = re.compile(r"<title>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+TOKEN_RE = re.compile(r"[a-z0-9]+")
 
 
 def normalize_text(raw: str) -> str:
@@ -56,8 +66,118 @@ def collect_pages() -> list[dict[str, str]]:
     return pages
 
 
+def trigrams(term: str) -> set[str]:
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_trigram_index(pages: list[dict[str, str]]) -> tuple[list[str], dict[str, list[int]]]:
+    """Return the sorted vocabulary and a trigram -> term-id posting map."""
+    terms: set[str] = set()
+    for page in pages:
+        terms.update(TOKEN_RE.findall(f"{page['title']} {page['text']}".lower()))
+    vocabulary = sorted(terms)
+
+    postings: dict[str, list[int]] = {}
+    for term_id, term in enumerate(vocabulary):
+        for gram in trigrams(term):
+            postings.setdefault(gram, []).append(term_id)
+    return vocabulary, dict(sorted(postings.items()))
+
+
+def u32_bytes(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array("I", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_binary_index(
+    pages: list[dict[str, str]],
+    vocabulary: list[str],
+    trigram_postings: dict[str, list[int]],
+) -> bytes:
+    """Serialize the corpus for zero-copy reads by scripts/local_backend.py.
+
+    Sections (little-endian u32 arrays unless noted, each 4-byte aligned):
+    0. blob: UTF-8 text for every string below (bytes)
+    1. docs: per doc, (offset, length) of url, title, text, lowercased title
+       and lowercased text in the blob
+    2. terms: per vocabulary term, (offset, length) in the blob; sorted
+    3. posting offsets: term_count + 1 bounds into sections 4 and 5
+    4. posting docs: ids of docs whose lowercased title/text contain the term
+    5. posting flags: 1 = in title, 2 = in text (bytes)
+    6. gram keys: sorted three-byte ASCII trigrams (bytes)
+    7. gram offsets: gram_count + 1 bounds into section 8
+    8. gram terms: term ids per trigram
+    """
+    blob = bytearray()
+
+    def add(value: str) -> tuple[int, int]:
+        data = value.encode("utf-8")
+        offset = len(blob)
+        blob.extend(data)
+        return offset, len(data)
+
+    lowered = [(page["title"].lower(), page["text"].lower()) for page in pages]
+    docs = array("I")
+    for page, (title_lc, text_lc) in zip(pages, lowered):
+        for value in (page["url"], page["title"], page["text"], title_lc, text_lc):
+            docs.extend(add(value))
+
+    terms = array("I")
+    posting_offsets = array("I", [0])
+    posting_docs = array("I")
+    posting_flags = bytearray()
+    for term in vocabulary:
+        terms.extend(add(term))
+        for doc_id, (title_lc, text_lc) in enumerate(lowered):
+            flags = (1 if term in title_lc else 0) | (2 if term in text_lc else 0)
+            if flags:
+                posting_docs.append(doc_id)
+                posting_flags.append(flags)
+        posting_offsets.append(len(posting_docs))
+
+    gram_keys = bytearray()
+    gram_offsets = array("I", [0])
+    gram_terms = array("I")
+    for gram, term_ids in sorted(trigram_postings.items()):
+        gram_keys.extend(gram.encode("ascii"))
+        gram_terms.extend(term_ids)
+        gram_offsets.append(len(gram_terms))
+
+    sections = [
+        bytes(blob),
+        u32_bytes(docs),
+        u32_bytes(terms),
+        u32_bytes(posting_offsets),
+        u32_bytes(posting_docs),
+        bytes(posting_flags),
+        bytes(gram_keys),
+        u32_bytes(gram_offsets),
+        u32_bytes(gram_terms),
+    ]
+    body = bytearray()
+    bounds: list[int] = []
+    for section in sections:
+        body.extend(b"\0" * (-(BINARY_HEADER.size + len(body)) % 4))
+        bounds.extend((BINARY_HEADER.size + len(body), len(section)))
+        body.extend(section)
+
+    header = BINARY_HEADER.pack(
+        BINARY_MAGIC,
+        BINARY_VERSION,
+        len(pages),
+        len(vocabulary),
+        len(trigram_postings),
+        *bounds,
+    )
+    return header + bytes(body)
+
+
 def main() -> None:
     pages = collect_pages()
+    vocabulary, postings = build_trigram_index(pages)
     payload = {
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "page_count": len(pages),
@@ -66,7 +186,14 @@ def main() -> None:
 
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
     OUTPUT_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-    print(f"wrote {OUTPUT_PATH.relative_to(ROOT)} with {len(pages)} pages")
+    # Write then rename so servers mapping the old file never see a partial one.
+    staging = BINARY_PATH.with_suffix(".bin.tmp")
+    staging.write_bytes(encode_binary_index(pages, vocabulary, postings))
+    staging.replace(BINARY_PATH)
+    print(
+        f"wrote {OUTPUT_PATH.relative_to(ROOT)} and {BINARY_PATH.relative_to(ROOT)} "
+        f"with {len(pages)} pages and {len(vocabulary)} terms"
+    )
 
 
 if __name__ == "__main__":
@@ -5,71 +5,600 @@ from __future__ import annotations
 
 import argparse
 import json
+import mmap
+import multiprocessing
+import os
+import queue
 import re
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
 from datetime import datetime, timezone
 from http import HTTPStatus
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import parse_qs, unquote, urlparse
 
 ROOT = Path(__file__).resolve().parents[1]
-SEARCH_INDEX_PATH = ROOT / "assets" / "data" / "search-index.json"
+SEARCH_BINARY_PATH = ROOT / "assets" / "data" / "search-index.bin"
+SEARCH_BINARY_MAGIC = b"VWSI"
+SEARCH_BINARY_VERSION = 1
+SEARCH_BINARY_HEADER = struct.Struct("<4s4I18I")
+PRELOAD_MANIFEST_PATH = ROOT / "assets" / "data" / "preload-manifest.json"
 SUBMISSIONS_PATH = ROOT / "data" / "form-submissions.ndjson"
+QUERY_LOG_PATH = ROOT / "data" / "search-queries.ndjson"
+TOP_QUERIES_PATH = ROOT / "data" / "search-top-queries.json"
 TOKEN_RE = re.compile(r"[a-z0-9]+")
 
+# Fuzzy matching weights relative to an exact token hit.
+PREFIX_WEIGHT = 0.75
+MAX_EXPANSIONS = 8
 
-def load_search_pages() -> list[dict[str, str]]:
-    if not SEARCH_INDEX_PATH.exists():
-        return []
-    payload = json.loads(SEARCH_INDEX_PATH.read_text(encoding="utf-8"))
-    pages = payload.get("pages", [])
-    return pages if isinstance(pages, list) else []
+# Result cache and the popular queries used to warm it after an index reload.
+RESULT_CACHE_SIZE = 512
+WARM_QUERY_COUNT = 50
+# Queries kept in the summary (and in memory between summaries); the long
+# tail is dropped, which bounds both.
+TRACKED_QUERY_COUNT = 1000
+
+# Query log writer: lines are flushed in batches, the summary every interval.
+QUERY_LOG_QUEUE_SIZE = 10000
+QUERY_LOG_BATCH_SIZE = 256
+QUERY_LOG_FLUSH_SECONDS = 1.0
+TOP_QUERIES_INTERVAL_SECONDS = 300.0
+
+# Worker supervision: a worker that dies sooner than this after starting is
+# respawned with exponential backoff instead of immediately.
+WORKER_STABLE_SECONDS = 10.0
+RESPAWN_BASE_DELAY = 1.0
+RESPAWN_MAX_DELAY = 60.0
+PARENT_POLL_SECONDS = 1.0
+
+_json_cache: dict[Path, tuple[float, dict]] = {}
+
+
+def load_json(path: Path) -> dict:
+    """Return the parsed JSON object at path, re-reading it only when it changes."""
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return {}
+    cached = _json_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        cached = (mtime, payload if isinstance(payload, dict) else {})
+        _json_cache[path] = cached
+    return cached[1]
+
+
+class SearchIndex:
+    """Read-only, memory-mapped view of search-index.bin.
+
+    Strings are decoded from the mapping only when a result needs them and
+    posting lists are memoryviews over it, so resident memory stays small and
+    the page cache is shared by every process serving the same file. See
+    build_search_index.encode_binary_index() for the layout.
+    """
+
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.doc_count, self.term_count, self.gram_count, *bounds = SEARCH_BINARY_HEADER.unpack_from(
+            self._map
+        )
+        if magic != SEARCH_BINARY_MAGIC or version != SEARCH_BINARY_VERSION:
+            raise ValueError(f"{path} is not a version {SEARCH_BINARY_VERSION} search index")
+
+        view = memoryview(self._map)
+        sections = [view[offset:offset + length] for offset, length in zip(bounds[::2], bounds[1::2])]
+        self._blob_start = bounds[0]
+        self._blob = sections[0]
+        self._docs = u32_view(sections[1])
+        self._terms = u32_view(sections[2])
+        self._posting_offsets = u32_view(sections[3])
+        self._posting_docs = u32_view(sections[4])
+        self._posting_flags = sections[5]
+        self._gram_keys = sections[6]
+        self._gram_offsets = u32_view(sections[7])
+        self._gram_terms = u32_view(sections[8])
+
+    def _string(self, offset: int, length: int) -> str:
+        return str(self._blob[offset:offset + length], "utf-8")
+
+    def _doc_field(self, doc_id: int, field: int) -> tuple[int, int]:
+        base = doc_id * 10 + field * 2
+        return self._docs[base], self._docs[base + 1]
+
+    def url(self, doc_id: int) -> str:
+        return self._string(*self._doc_field(doc_id, 0))
+
+    def title(self, doc_id: int) -> str:
+        return self._string(*self._doc_field(doc_id, 1))
+
+    def snippet(self, doc_id: int, chars: int) -> str:
+        offset, length = self._doc_field(doc_id, 2)
+        # A UTF-8 character is at most four bytes; drop a split trailing one.
+        raw = self._blob[offset:offset + min(length, chars * 4)]
+        return str(raw, "utf-8", "ignore")[:chars]
+
+    def term(self, term_id: int) -> str:
+        return self._string(self._terms[term_id * 2], self._terms[term_id * 2 + 1])
+
+    def term_id(self, term: str) -> int | None:
+        target = term.encode("utf-8")
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            offset, length = self._terms[middle * 2], self._terms[middle * 2 + 1]
+            if bytes(self._blob[offset:offset + length]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.term_count and self.term(low) == term:
+            return low
+        return None
+
+    def gram_terms(self, gram: str) -> memoryview:
+        """Return ids of the vocabulary terms containing the padded trigram."""
+        target = gram.encode("utf-8")
+        low, high = 0, self.gram_count
+        while low < high:
+            middle = (low + high) // 2
+            if bytes(self._gram_keys[middle * 3:middle * 3 + 3]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.gram_count and self._gram_keys[low * 3:low * 3 + 3] == target:
+            return self._gram_terms[self._gram_offsets[low]:self._gram_offsets[low + 1]]
+        return self._gram_terms[0:0]
+
+    def matches(self, term: str) -> list[tuple[int, int]]:
+        """Return (doc_id, flags) for docs whose title (1) or text (2) contain vocabulary term."""
+        term_id = self.term_id(term)
+        if term_id is None:
+            # Partial and misspelled words reach documents through expand_token().
+            return []
+        start, end = self._posting_offsets[term_id], self._posting_offsets[term_id + 1]
+        return list(zip(self._posting_docs[start:end], self._posting_flags[start:end]))
+
+
+def u32_view(section: memoryview) -> memoryview | array:
+    if sys.byteorder == "little":
+        return section.cast("I")
+    values = array("I", section.tobytes())
+    values.byteswap()
+    return values
+
+
+_search_index: tuple[tuple[int, int], SearchIndex | None] = ((-1, -1), None)
+_search_index_lock = threading.Lock()
+
+
+def load_search_index() -> SearchIndex | None:
+    """Return the mapped search index, remapping it after the file is replaced."""
+    global _search_index
+    try:
+        stat = SEARCH_BINARY_PATH.stat()
+    except FileNotFoundError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_ino)
+    with _search_index_lock:
+        if _search_index[0] == key:
+            return _search_index[1]
+        _search_index = (key, SearchIndex(SEARCH_BINARY_PATH))
+        index = _search_index[1]
+    # A fresh mapping starts with an empty result cache; refill it off the request path.
+    threading.Thread(target=warm_result_cache, name="search-warmup", daemon=True).start()
+    return index
+
+
+_result_cache: tuple[SearchIndex | None, OrderedDict[str, list[dict[str, str]]]] = (None, OrderedDict())
+_result_cache_lock = threading.Lock()
+
+
+def cached_results(index: SearchIndex, query: str) -> list[dict[str, str]] | None:
+    with _result_cache_lock:
+        owner, entries = _result_cache
+        if owner is not index or query not in entries:
+            return None
+        entries.move_to_end(query)
+        return entries[query]
+
+
+def store_results(index: SearchIndex, query: str, results: list[dict[str, str]]) -> None:
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache[0] is not index:
+            _result_cache = (index, OrderedDict())
+        entries = _result_cache[1]
+        entries[query] = results
+        entries.move_to_end(query)
+        while len(entries) > RESULT_CACHE_SIZE:
+            entries.popitem(last=False)
+
+
+def warm_result_cache() -> None:
+    """Run the most frequent logged queries so their results are cached."""
+    queries = load_json(TOP_QUERIES_PATH).get("queries", [])
+    if not isinstance(queries, list):
+        return
+    warmed = 0
+    for entry in queries[:WARM_QUERY_COUNT]:
+        query = entry.get("query") if isinstance(entry, dict) else None
+        if isinstance(query, str) and query:
+            search_pages(query)
+            warmed += 1
+    if warmed:
+        print(f"warmed search cache with {warmed} popular queries")
+
+
+_submissions_lock = threading.Lock()
+
+
+def append_submission(record: dict) -> None:
+    SUBMISSIONS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(record) + "\n"
+    with _submissions_lock, SUBMISSIONS_PATH.open("a", encoding="utf-8") as handle:
+        handle.write(line)
+
+
+class QueryLog:
+    """Append search queries to an NDJSON log from a background thread.
+
+    record() only enqueues, so searches never wait on the disk. The writer
+    flushes queued entries in batches and periodically rewrites the top-queries
+    summary that warm_result_cache() reads. The summary also stores how much
+    of the log its counts cover, so start() restores the counts from it and
+    replays only the lines appended after the last summary.
+    """
+
+    def __init__(self, log_path: Path = QUERY_LOG_PATH, summary_path: Path = TOP_QUERIES_PATH) -> None:
+        self.log_path = log_path
+        self.summary_path = summary_path
+        self._queue: queue.Queue[dict | None] = queue.Queue(maxsize=QUERY_LOG_QUEUE_SIZE)
+        # query -> [count, total latency in ms, result count of the latest run]
+        self._stats: dict[str, list[float]] = {}
+        self._total = 0
+        self._log_offset = 0
+        self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+
+    def start(self) -> None:
+        # Restore before the thread runs so nothing queues up behind the replay.
+        self._restore()
+        self._thread.start()
+
+    def record(self, entry: dict) -> None:
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            pass  # Losing a log line is better than stalling a search.
+
+    def close(self) -> None:
+        try:
+            self._queue.put(None, timeout=1.0)
+        except queue.Full:
+            return
+        self._thread.join(timeout=5.0)
+
+    def _count(self, entry: dict) -> None:
+        query = entry.get("query")
+        if not isinstance(query, str) or not query:
+            return
+        stats = self._stats.setdefault(query, [0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += float(entry.get("latency_ms", 0.0))
+        stats[2] = int(entry.get("results", 0))
+        self._total += 1
+
+    def _restore(self) -> None:
+        try:
+            summary = json.loads(self.summary_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            summary = {}
+        for entry in summary.get("queries", []):
+            try:
+                count = int(entry["count"])
+                self._stats[str(entry["query"])] = [count, float(entry["avg_latency_ms"]) * count, int(entry["results"])]
+            except (KeyError, TypeError, ValueError):
+                continue
+        self._total = int(summary.get("total_queries", 0))
+        self._log_offset = int(summary.get("log_offset", 0))
+
+        try:
+            size = self.log_path.stat().st_size
+        except FileNotFoundError:
+            self._log_offset = 0
+            return
+        if size < self._log_offset:
+            # The log was rotated or truncated; its new contents are all uncounted.
+            self._log_offset = 0
+        with self.log_path.open("rb") as handle:
+            handle.seek(self._log_offset)
+            for line in handle:
+                self._log_offset += len(line)
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(entry, dict):
+                    self._count(entry)
+
+    def _write_batch(self, batch: list[dict]) -> None:
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json.dumps(entry) + "\n" for entry in batch).encode("utf-8")
+        with self.log_path.open("ab") as handle:
+            handle.write(lines)
+            self._log_offset = handle.tell()
+        for entry in batch:
+            self._count(entry)
+
+    def _write_summary(self) -> None:
+        ranked = sorted(self._stats.items(), key=lambda item: (-item[1][0], item[0]))[:TRACKED_QUERY_COUNT]
+        self._stats = dict(ranked)
+        payload = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "total_queries": self._total,
+            "log_offset": self._log_offset,
+            "queries": [
+                {
+                    "query": query,
+                    "count": int(count),
+                    "avg_latency_ms": round(total_latency / count, 3),
+                    "results": int(results),
+                }
+                for query, (count, total_latency, results) in ranked
+            ],
+        }
+        self.summary_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.summary_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.summary_path)
+
+    def _run(self) -> None:
+        dirty = True
+        next_summary = time.monotonic() + TOP_QUERIES_INTERVAL_SECONDS
+        stopping = False
+        while not stopping:
+            batch: list[dict] = []
+            try:
+                entry = self._queue.get(timeout=QUERY_LOG_FLUSH_SECONDS)
+                while True:
+                    if entry is None:
+                        stopping = True
+                        break
+                    batch.append(entry)
+                    if len(batch) >= QUERY_LOG_BATCH_SIZE:
+                        break
+                    entry = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                if batch:
+                    self._write_batch(batch)
+                    dirty = True
+                if dirty and (stopping or time.monotonic() >= next_summary):
+                    self._write_summary()
+                    dirty = False
+                    next_summary = time.monotonic() + TOP_QUERIES_INTERVAL_SECONDS
+            except OSError as exc:
+                print(f"query log write failed: {exc}", file=sys.stderr)
+
+
+def load_preload_manifest() -> dict[str, list[dict[str, str]]]:
+    pages = load_json(PRELOAD_MANIFEST_PATH).get("pages", {})
+    return pages if isinstance(pages, dict) else {}
+
+
+def format_link_header(entries: list[dict[str, str]]) -> str:
+    links = []
+    for entry in entries:
+        link = f"<{entry['href']}>; rel=preload; as={entry['as']}"
+        if entry.get("type"):
+            link += f'; type="{entry["type"]}"'
+        if entry.get("crossorigin"):
+            link += "; crossorigin"
+        if entry.get("imagesrcset"):
+            link += f'; imagesrcset="{entry["imagesrcset"]}"'
+        if entry.get("imagesizes"):
+            link += f'; imagesizes="{entry["imagesizes"]}"'
+        links.append(link)
+    return ", ".join(links)
+
+
+def preload_links_for(request_path: str) -> str:
+    page = unquote(request_path).lstrip("/")
+    if not page or page.endswith("/"):
+        page += "index.html"
+    entries = load_preload_manifest().get(page, [])
+    return format_link_header(entries) if isinstance(entries, list) else ""
 
 
 def tokenize(text: str) -> list[str]:
     return TOKEN_RE.findall(text.lower())
 
 
-def score(entry: dict[str, str], query_tokens: list[str]) -> int:
-    title = str(entry.get("title", "")).lower()
-    body = str(entry.get("text", "")).lower()
-    points = 0
-    for token in query_tokens:
-        if token in title:
-            points += 8
-        if token in body:
-            points += 2
-    return points
+def normalize_query(query: str) -> str:
+    """Return the form of query that determines its results (and its cache key)."""
+    return " ".join(tokenize(query))
+
+
+def trigrams(term: str) -> set[str]:
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(token: str) -> int:
+    if len(token) <= 2:
+        return 0
+    return 1 if len(token) <= 5 else 2
+
+
+def bounded_edit_distance(left: str, right: str, limit: int) -> int:
+    """Edit distance counting adjacent transpositions as one edit.
+
+    Returns limit + 1 as soon as the distance must exceed limit.
+    """
+    if abs(len(left) - len(right)) > limit:
+        return limit + 1
+    before_previous: list[int] = []
+    previous = list(range(len(right) + 1))
+    for i, left_char in enumerate(left, start=1):
+        current = [i]
+        for j, right_char in enumerate(right, start=1):
+            cost = 0 if left_char == right_char else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and left_char == right[j - 2] and left[i - 2] == right_char:
+                value = min(value, before_previous[j - 2] + 1)
+            current.append(value)
+        if min(current) > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+def fuzzy_terms(token: str, index: SearchIndex) -> dict[str, float]:
+    """Return vocabulary terms within max_edits(token), found via shared trigrams."""
+    limit = max_edits(token)
+    if not limit:
+        return {}
+    grams = trigrams(token)
+    shared = Counter()
+    for gram in grams:
+        shared.update(index.gram_terms(gram))
+
+    # q-gram lemma: each edit destroys at most three trigrams.
+    needed = max(1, len(grams) - 3 * limit)
+    matches: dict[str, float] = {}
+    for term_id, count in shared.items():
+        if count < needed:
+            continue
+        term = index.term(term_id)
+        if len(term) < 3:
+            continue
+        distance = bounded_edit_distance(token, term, limit)
+        if 0 < distance <= limit:
+            matches[term] = 1 / (1 + distance)
+
+    # A swap inside a short word can leave no trigram in common ("deim" vs
+    # "diem"), so probe adjacent transpositions directly.
+    for i in range(len(token) - 1):
+        swapped = f"{token[:i]}{token[i + 1]}{token[i]}{token[i + 2:]}"
+        if swapped != token and index.term_id(swapped) is not None:
+            matches.setdefault(swapped, 0.5)
+    return matches
+
+
+def prefix_terms(token: str, index: SearchIndex) -> dict[str, float]:
+    """Return completions of token by intersecting the posting lists of its leading trigrams."""
+    if len(token) < 2:
+        return {}
+    lists = sorted((index.gram_terms(gram) for gram in trigrams(token) if not gram.endswith("$")), key=len)
+    if not lists:
+        return {}
+    candidates = set(lists[0])
+    for ids in lists[1:]:
+        candidates.intersection_update(ids)
+        if not candidates:
+            return {}
+    completions = sorted(
+        (term for term in map(index.term, candidates) if term.startswith(token)),
+        key=lambda term: (len(term), term),
+    )
+    return {term: PREFIX_WEIGHT for term in completions if term != token}
+
+
+def expand_token(index: SearchIndex, token: str, complete_prefix: bool = False) -> list[tuple[str, float]]:
+    # Known words are taken as spelled; only unknown ones get typo expansion,
+    # and they are completed wherever they appear ("antiw movement").
+    known = index.term_id(token) is not None
+    expansions = {token: 1.0} if known else {}
+    if not known:
+        for term, weight in fuzzy_terms(token, index).items():
+            expansions.setdefault(term, weight)
+    if complete_prefix or not known:
+        for term, weight in prefix_terms(token, index).items():
+            expansions.setdefault(term, weight)
+    ranked = sorted(expansions.items(), key=lambda item: item[1], reverse=True)
+    return ranked[:MAX_EXPANSIONS]
+
+
+def score_documents(index: SearchIndex, expanded_tokens: list[list[tuple[str, float]]]) -> dict[int, float]:
+    totals: dict[int, float] = {}
+    for alternatives in expanded_tokens:
+        best: dict[int, float] = {}
+        for term, weight in alternatives:
+            for doc_id, flags in index.matches(term):
+                hit = 0
+                if flags & 1:
+                    hit += 8
+                if flags & 2:
+                    hit += 2
+                best[doc_id] = max(best.get(doc_id, 0.0), hit * weight)
+        for doc_id, points in best.items():
+            totals[doc_id] = totals.get(doc_id, 0.0) + points
+    return totals
 
 
 def search_pages(query: str) -> list[dict[str, str]]:
     tokens = tokenize(query)
-    if not tokens:
+    index = load_search_index()
+    if not tokens or index is None:
         return []
-
-    ranked: list[tuple[int, dict[str, str]]] = []
-    for entry in load_search_pages():
-        rank = score(entry, tokens)
-        if rank > 0:
-            ranked.append((rank, entry))
-
-    ranked.sort(key=lambda item: item[0], reverse=True)
+    key = " ".join(tokens)
+    cached = cached_results(index, key)
+    if cached is not None:
+        return cached
+
+    # Only the last token can still be mid-word while the user types.
+    expanded = [
+        expand_token(index, token, complete_prefix=position == len(tokens) - 1)
+        for position, token in enumerate(tokens)
+    ]
+
+    ranked = sorted(score_documents(index, expanded).items(), key=lambda item: (-item[1], item[0]))
     results = []
-    for _, entry in ranked[:20]:
+    for doc_id, _ in ranked[:20]:
         results.append(
             {
-                "url": entry.get("url", ""),
-                "title": entry.get("title", ""),
-                "snippet": str(entry.get("text", ""))[:240],
+                "url": index.url(doc_id),
+                "title": index.title(doc_id),
+                "snippet": index.snippet(doc_id, 240),
             }
         )
+    store_results(index, key, results)
     return results
 
 
 class LocalHandler(SimpleHTTPRequestHandler):
+    early_hints = False
+    # Worker processes replace this with a queue feeding the single writer.
+    submission_sink = staticmethod(append_submission)
+    # Set to QueryLog.record (or the queue to the parent's writer) when serving.
+    query_sink = None
+
     def __init__(self, *args, **kwargs):
+        self._preload_links = ""
         super().__init__(*args, directory=str(ROOT), **kwargs)
 
+    def end_headers(self) -> None:
+        if self._preload_links:
+            self.send_header("Link", self._preload_links)
+            self._preload_links = ""
+        super().end_headers()
+
+    def _send_early_hints(self, links: str) -> None:
+        # 1xx responses must not be sent to HTTP/1.0 clients.
+        if self.request_version == "HTTP/1.0":
+            return
+        self.send_response_only(HTTPStatus.EARLY_HINTS)
+        self.send_header("Link", links)
+        self.end_headers()
+
     def _send_json(self, payload: dict, status: int = HTTPStatus.OK) -> None:
         body = json.dumps(payload).encode("utf-8")
         self.send_response(status)
@@ -84,10 +613,26 @@ class LocalHandler(SimpleHTTPRequestHandler):
 
         if parsed.path == "/api/search":
             query = parse_qs(parsed.query).get("q", [""])[0].strip()
+            started = time.perf_counter()
             results = search_pages(query)
+            latency_ms = (time.perf_counter() - started) * 1000
             self._send_json({"ok": True, "query": query, "results": results})
+            normalized = normalize_query(query)
+            if normalized and self.query_sink is not None:
+                self.query_sink(
+                    {
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "query": normalized,
+                        "results": len(results),
+                        "latency_ms": round(latency_ms, 3),
+                    }
+                )
             return
 
+        links = preload_links_for(parsed.path)
+        if links and self.early_hints:
+            self._send_early_hints(links)
+        self._preload_links = links
         super().do_GET()
 
     def do_POST(self) -> None:  # noqa: N802
@@ -129,7 +674,6 @@ class LocalHandler(SimpleHTTPRequestHandler):
             self._send_json({"ok": False, "error": "fields must be a non-empty object"}, status=HTTPStatus.BAD_REQUEST)
             return
 
-        SUBMISSIONS_PATH.parent.mkdir(parents=True, exist_ok=True)
         record = {
             "id": datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f"),
             "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -139,9 +683,7 @@ class LocalHandler(SimpleHTTPRequestHandler):
             "userAgent": self.headers.get("User-Agent", ""),
         }
 
-        with SUBMISSIONS_PATH.open("a", encoding="utf-8") as handle:
-            handle.write(json.dumps(record) + "\n")
-
+        self.submission_sink(record)
         self._send_json({"ok": True, "id": record["id"]})
 
 
@@ -149,11 +691,181 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Serve local static site + form/search APIs")
     parser.add_argument("--host", default="127.0.0.1")
     parser.add_argument("--port", type=int, default=8000)
-    return parser.parse_args()
+    parser.add_argument(
+        "--early-hints",
+        action="store_true",
+        help="send 103 Early Hints with each page's preload links (switches to HTTP/1.1)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of server processes sharing the listening socket",
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
+
+
+def raise_keyboard_interrupt(signum: int, frame: object) -> None:
+    raise KeyboardInterrupt
+
+
+def shutdown_when_orphaned(server: ThreadingHTTPServer, parent_pid: int) -> None:
+    while os.getppid() == parent_pid:
+        time.sleep(PARENT_POLL_SECONDS)
+    server.shutdown()
+
+
+def configure_handler(early_hints: bool) -> None:
+    if early_hints:
+        LocalHandler.protocol_version = "HTTP/1.1"
+        LocalHandler.early_hints = True
+
+
+def run_worker(
+    listener: socket.socket,
+    submissions: multiprocessing.Queue,
+    queries: multiprocessing.Queue,
+    parent_pid: int,
+    early_hints: bool,
+) -> None:
+    # SIGTERM from the parent unwinds like Ctrl-C so queued records get flushed.
+    signal.signal(signal.SIGTERM, raise_keyboard_interrupt)
+    configure_handler(early_hints)
+    LocalHandler.submission_sink = staticmethod(submissions.put)
+    LocalHandler.query_sink = staticmethod(queries.put)
+    load_search_index()
+    server = ThreadingHTTPServer(listener.getsockname()[:2], LocalHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = listener
+    threading.Thread(target=shutdown_when_orphaned, args=(server, parent_pid), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def drain_queries(queries: multiprocessing.Queue, query_log: QueryLog) -> None:
+    while True:
+        try:
+            query_log.record(queries.get_nowait())
+        except queue.Empty:
+            return
+
+
+def drain_submissions(submissions: multiprocessing.Queue) -> None:
+    while True:
+        try:
+            append_submission(submissions.get_nowait())
+        except queue.Empty:
+            return
+
+
+def respawn_delay(failures: int) -> float:
+    if not failures:
+        return 0.0
+    return min(RESPAWN_MAX_DELAY, RESPAWN_BASE_DELAY * 2 ** (failures - 1))
+
+
+def serve_workers(args: argparse.Namespace) -> None:
+    """Run workers on one listening socket; this process writes the logs.
+
+    Workers map the same search-index.bin, so its pages are shared through the
+    page cache, and each one remaps it (and rewarms its result cache) when
+    build_search_index.py renames a new file into place. Submissions and search
+    queries arrive over queues so only this process appends to the NDJSON logs.
+    SIGTERM shuts down like Ctrl-C, and workers exit on their own if this
+    process dies without cleaning up.
+
+    Workers are spawned rather than forked: this process runs the query-log
+    writer thread, and forking a threaded process can leave locks held in
+    the child.
+    """
+    listener = socket.create_server((args.host, args.port))
+    context = multiprocessing.get_context("spawn")
+    submissions = context.Queue()
+    queries = context.Queue()
+    query_log = QueryLog()
+    query_log.start()
+
+    signal.signal(signal.SIGTERM, raise_keyboard_interrupt)
+
+    def spawn(slot: dict) -> None:
+        worker = context.Process(
+            target=run_worker,
+            args=(listener, submissions, queries, os.getpid(), args.early_hints),
+            daemon=True,
+        )
+        worker.start()
+        slot["process"] = worker
+        slot["started_at"] = time.monotonic()
+
+    slots = [{"process": None, "started_at": 0.0, "failures": 0, "respawn_at": 0.0} for _ in range(args.workers)]
+    for slot in slots:
+        spawn(slot)
+    print(f"serving {ROOT} on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        while True:
+            try:
+                append_submission(submissions.get(timeout=1.0))
+            except queue.Empty:
+                pass
+            drain_queries(queries, query_log)
+            now = time.monotonic()
+            for slot in slots:
+                worker = slot["process"]
+                if worker is not None and not worker.is_alive():
+                    crashed_early = now - slot["started_at"] < WORKER_STABLE_SECONDS
+                    slot["failures"] = slot["failures"] + 1 if crashed_early else 0
+                    delay = respawn_delay(slot["failures"])
+                    print(f"worker {worker.pid} exited with {worker.exitcode}; restarting in {delay:.0f}s")
+                    slot["process"] = None
+                    slot["respawn_at"] = now + delay
+                if slot["process"] is None and now >= slot["respawn_at"]:
+                    spawn(slot)
+    except KeyboardInterrupt:
+        print("\nshutting down")
+    finally:
+        # A second Ctrl-C or SIGTERM must not interrupt the cleanup below.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        workers = [slot["process"] for slot in slots if slot["process"] is not None]
+        for worker in workers:
+            worker.terminate()
+        # Keep reading while workers exit so their queue feeders can flush.
+        while any(worker.is_alive() for worker in workers):
+            drain_submissions(submissions)
+            drain_queries(queries, query_log)
+            for worker in workers:
+                worker.join(timeout=0.1)
+        # Keep submissions that were accepted before shutdown.
+        while True:
+            try:
+                append_submission(submissions.get(timeout=0.1))
+            except queue.Empty:
+                break
+        drain_queries(queries, query_log)
+        query_log.close()
+        listener.close()
 
 
 def main() -> None:
     args = parse_args()
+    configure_handler(args.early_hints)
+    if args.workers > 1:
+        serve_workers(args)
+        return
+
+    signal.signal(signal.SIGTERM, raise_keyboard_interrupt)
+    query_log = QueryLog()
+    query_log.start()
+    LocalHandler.query_sink = staticmethod(query_log.record)
+    load_search_index()
+
     server = ThreadingHTTPServer((args.host, args.port), LocalHandler)
     print(f"serving {ROOT} on http://{args.host}:{args.port}")
     try:
@@ -162,6 +874,7 @@ def main() -> None:
         print("\nshutting down")
     finally:
         server.server_close()
+        query_log.close()
 
 
 if __name__ == "__main__":
@@ -13,6 +13,7 @@ This script:
 from __future__ import annotations
 
 import concurrent.futures
+import functools
 import hashlib
 import html
 import json
@@ -25,7 +26,7 @@ import urllib.error
 import urllib.parse
 import urllib.request
 from pathlib import Path
-from typing import Dict, Iterable, List, Set, Tuple
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
 
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -62,6 +63,19 @@ TEXT_EXTENSIONS = {
 
 STOPPERS = ("&quot;", "&#34;", "&apos;", "&#39;", "&gt;", "&lt;")
 
+# Byte-level prefilters: only delimiter-bounded segments containing one of
+# these are decoded, unescaped and run through URL_PATTERN.
+TARGET_HOST_BYTES_RE = re.compile(
+    b"|".join(re.escape(domain.encode("ascii")) for domain in sorted(TARGET_DOMAINS)),
+    re.IGNORECASE,
+)
+# Also match entity-encoded slashes (https:&#x2F;&#x2F;..., https:&sol;&sol;...),
+# which html.unescape() turns into "//" before URL_PATTERN runs.
+URL_MARKER_BYTES_RE = re.compile(rb"//|\\/\\/|&#(?:x0*2f|0*47)|&sol;", re.IGNORECASE)
+# Bytes URL_PATTERN never matches across, before or after html.unescape().
+SEGMENT_DELIMITERS = (b" ", b"\t", b"\r", b"\n", b'"', b"'", b"<", b">")
+MAX_SEGMENT_BYTES = 16384
+
 
 def read_text(path: Path) -> str:
     return path.read_text(encoding="utf-8", errors="surrogateescape")
@@ -72,6 +86,7 @@ def write_text(path: Path, content: str) -> None:
     path.write_text(content, encoding="utf-8", errors="surrogateescape")
 
 
+@functools.lru_cache(maxsize=65536)
 def normalize_url_token(token: str) -> str:
     value = html.unescape(token.strip())
     value = value.replace("\\/", "/")
@@ -90,6 +105,7 @@ def canonicalize_url(normalized: str) -> str:
     return normalized
 
 
+@functools.lru_cache(maxsize=65536)
 def get_hostname(url: str) -> str:
     try:
         return (urllib.parse.urlsplit(url).hostname or "").lower()
@@ -105,6 +121,41 @@ def extract_urls_from_text(text: str) -> Set[str]:
     return {normalize_url_token(m.group(0)) for m in URL_PATTERN.finditer(text)}
 
 
+def candidate_segments(data: bytes, marker_re: "re.Pattern[bytes]") -> Iterator[bytes]:
+    """Yield the delimiter-bounded slices of data that contain a marker match."""
+    position = 0
+    for match in marker_re.finditer(data):
+        if match.start() < position:
+            continue
+        low = max(position, match.start() - MAX_SEGMENT_BYTES)
+        start = max([data.rfind(delim, low, match.start()) + 1 for delim in SEGMENT_DELIMITERS] + [low])
+        high = min(len(data), match.end() + MAX_SEGMENT_BYTES)
+        ends = [data.find(delim, match.end(), high) for delim in SEGMENT_DELIMITERS]
+        end = min([index for index in ends if index != -1] + [high])
+        yield data[start:end]
+        position = end
+
+
+def extract_url_tokens(data: bytes, marker_re: "re.Pattern[bytes]" = URL_MARKER_BYTES_RE) -> Set[str]:
+    """extract_urls_from_text(html.unescape(text)), restricted to prefiltered segments."""
+    tokens: Set[str] = set()
+    for segment in candidate_segments(data, marker_re):
+        text = segment.decode("utf-8", errors="surrogateescape")
+        if "&" in text:
+            text = html.unescape(text)
+        tokens.update(extract_urls_from_text(text))
+    return tokens
+
+
+def extract_target_tokens(data: bytes) -> Set[str]:
+    tokens = extract_url_tokens(data, TARGET_HOST_BYTES_RE)
+    return {token for token in tokens if token and is_target_url(canonicalize_url(token))}
+
+
+def scan_file_tokens(path: Path) -> Set[str]:
+    return extract_url_tokens(path.read_bytes())
+
+
 def collect_html_inventory(
     html_files: Iterable[Path],
 ) -> Tuple[Set[str], Set[str], Set[str], Dict[Path, Set[str]], Dict[Path, Set[str]]]:
@@ -115,10 +166,13 @@ def collect_html_inventory(
     file_target_tokens: Dict[Path, Set[str]] = {}
     file_all_tokens: Dict[Path, Set[str]] = {}
 
-    for path in html_files:
-        content = read_text(path)
-        decoded = html.unescape(content)
-        tokens = extract_urls_from_text(decoded)
+    paths = list(html_files)
+    scanned: List[Set[str]] = []
+    if paths:
+        with concurrent.futures.ProcessPoolExecutor() as pool:
+            scanned = list(pool.map(scan_file_tokens, paths))
+
+    for path, tokens in zip(paths, scanned):
         file_all_tokens[path] = set()
         file_target_tokens[path] = set()
         for token in tokens:
@@ -295,27 +349,26 @@ def main() -> int:
                 except Exception as exc:  # noqa: BLE001
                     failed_urls[canonical] = str(exc)
 
+        text_assets: List[Tuple[Path, bytes]] = []
         for canonical, body, content_type in results:
             processed.add(canonical)
             store_rel = canonical_to_store_path[canonical]
             store_abs = REPO_ROOT / store_rel
             store_abs.parent.mkdir(parents=True, exist_ok=True)
             store_abs.write_bytes(body)
+            if is_text_file(store_abs, content_type):
+                text_assets.append((store_abs, body))
 
-            if not is_text_file(store_abs, content_type):
-                continue
+        discovered: List[Set[str]] = []
+        if text_assets:
+            with concurrent.futures.ProcessPoolExecutor() as pool:
+                discovered = list(pool.map(extract_target_tokens, [body for _, body in text_assets]))
 
-            text = body.decode("utf-8", errors="surrogateescape")
-            decoded = html.unescape(text)
-            tokens = extract_urls_from_text(decoded)
+        for (store_abs, _), tokens in zip(text_assets, discovered):
             if tokens:
                 discovered_target_tokens_by_file.setdefault(store_abs, set())
             for token in tokens:
-                if not token:
-                    continue
                 token_canonical = canonicalize_url(token)
-                if not is_target_url(token_canonical):
-                    continue
                 all_target_normalized_urls.add(token)
                 discovered_target_tokens_by_file[store_abs].add(token)
                 if token not in normalized_to_ref_path:
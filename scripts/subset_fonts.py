@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""Subset localized Typekit webfonts to the characters the site actually uses.
+
+This script:
+1. Collects every character used in the visible text of the HTML pages.
+2. Subsets each localized Typekit font referenced from an `@font-face` rule
+   in a stylesheet the pages load (directly or through `@import`) to that
+   character set and writes it as WOFF2 under assets/fonts/subset/.
+3. Prepends the subset to the rule's `src` list in that CSS; the original
+   sources stay behind it so the stage can be rerun.
+
+The pages currently get their Typekit faces from the kit script
+(use.typekit.net/ik/*.js), whose font files were not localized, so no page
+stylesheet has a localized `@font-face` rule and this stage is a no-op until
+one does.
+
+Subset files are named by source and character-set digest, so fonts are only
+re-subset when the used-character set (or the source font) changes. Every run
+still checks each `@font-face` rule, so a stylesheet restored by re-localizing
+gets its subset references back. Run this before scripts/build_css_bundles.py
+so bundles pick up the rewritten rules.
+
+Requires `fonttools` and `brotli` (for WOFF2) when a subset has to be built.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Set
+
+from build_search_index import normalize_text
+from phase1_localize import HTML_FILES, REPO_ROOT
+
+SUBSET_DIR = REPO_ROOT / "assets" / "fonts" / "subset"
+MANIFEST_PATH = SUBSET_DIR / "manifest.json"
+FONT_ROOTS = (
+    REPO_ROOT / "assets" / "use.typekit.net",
+    REPO_ROOT / "assets" / "p.typekit.net",
+)
+CSS_EXCLUDE_DIRS = (REPO_ROOT / "assets" / "css" / "bundles",)
+
+# Always keep printable ASCII: runtime JS renders labels and snippets too.
+BASE_CODEPOINTS = set(range(0x20, 0x7F))
+# Source formats in order of preference (least lossy to decode first).
+FORMAT_PREFERENCE = ("opentype", "truetype", "woff", "woff2")
+
+LINK_TAG_RE = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+LINK_REL_RE = re.compile(r"\brel\s*=\s*([\"'])(.*?)\1", re.IGNORECASE)
+LINK_HREF_RE = re.compile(r"\bhref\s*=\s*([\"'])(.*?)\1", re.IGNORECASE)
+CSS_IMPORT_RE = re.compile(r"@import\s+(?:url\(\s*)?([\"']?)([^\"')\s;]+)\1", re.IGNORECASE)
+FONT_FACE_RE = re.compile(r"@font-face\s*\{[^}]*\}", re.IGNORECASE)
+SRC_DECL_RE = re.compile(r"(\bsrc\s*:\s*)([^;}]*)", re.IGNORECASE)
+SRC_ENTRY_RE = re.compile(
+    r"url\(\s*([\"']?)([^\"')]+)\1\s*\)(?:\s*format\(\s*([\"']?)([^\"')]+)\3\s*\))?",
+    re.IGNORECASE,
+)
+
+
+def collect_codepoints(html_files: List[Path]) -> Set[int]:
+    codepoints = set(BASE_CODEPOINTS)
+    for path in html_files:
+        text = normalize_text(path.read_text(encoding="utf-8", errors="ignore"))
+        for char in set(text):
+            # text-transform can change case, so keep both forms.
+            for variant in {char, char.upper(), char.lower()}:
+                if len(variant) == 1 and variant.isprintable():
+                    codepoints.add(ord(variant))
+    return codepoints
+
+
+def charset_digest(codepoints: Set[int]) -> str:
+    payload = ",".join(f"{cp:x}" for cp in sorted(codepoints))
+    return hashlib.sha256(payload.encode("ascii")).hexdigest()
+
+
+def is_localized_font(path: Path) -> bool:
+    if not path.is_file():
+        return False
+    return any(root in path.parents for root in FONT_ROOTS)
+
+
+def resolve_ref(css_path: Path, ref: str) -> Path:
+    clean = ref.split("#", 1)[0].split("?", 1)[0]
+    return Path(os.path.normpath(css_path.parent / clean))
+
+
+def pick_source(css_path: Path, entries: List[re.Match[str]]) -> Path | None:
+    candidates: Dict[str, Path] = {}
+    for entry in entries:
+        path = resolve_ref(css_path, entry.group(2))
+        fmt = (entry.group(4) or "").lower()
+        if fmt in FORMAT_PREFERENCE and is_localized_font(path):
+            candidates.setdefault(fmt, path)
+    for fmt in FORMAT_PREFERENCE:
+        if fmt in candidates:
+            return candidates[fmt]
+    return None
+
+
+def subset_path_for(source: Path, digest: str) -> Path:
+    source_rel = source.relative_to(REPO_ROOT).as_posix()
+    source_key = hashlib.sha256(source_rel.encode("utf-8") + source.read_bytes()).hexdigest()[:12]
+    return SUBSET_DIR / f"{source_key}-{digest[:10]}.woff2"
+
+
+def build_subset(source: Path, target: Path, codepoints: Set[int]) -> None:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]
+    options.notdef_outline = True
+
+    font = TTFont(str(source))
+    subsetter = subset.Subsetter(options=options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    subset.save_font(font, str(target), options)
+
+
+def rewrite_css(
+    css_path: Path,
+    codepoints: Set[int],
+    digest: str,
+    outputs: Dict[str, str],
+    built: List[str],
+) -> bool:
+    original = css_path.read_text(encoding="utf-8", errors="surrogateescape")
+
+    def rewrite_src(match: re.Match[str]) -> str:
+        entries = [
+            entry
+            for entry in SRC_ENTRY_RE.finditer(match.group(2))
+            if SUBSET_DIR not in resolve_ref(css_path, entry.group(2)).parents
+        ]
+        source = pick_source(css_path, entries)
+        if source is None:
+            return match.group(0)
+
+        target = subset_path_for(source, digest)
+        if not target.exists():
+            build_subset(source, target, codepoints)
+            built.append(target.relative_to(REPO_ROOT).as_posix())
+        outputs[source.relative_to(REPO_ROOT).as_posix()] = target.relative_to(REPO_ROOT).as_posix()
+
+        subset_ref = os.path.relpath(target, css_path.parent).replace(os.sep, "/")
+        kept = ",".join(entry.group(0) for entry in entries)
+        return f'{match.group(1)}url("{subset_ref}") format("woff2"),{kept}'
+
+    def rewrite_face(match: re.Match[str]) -> str:
+        return SRC_DECL_RE.sub(rewrite_src, match.group(0))
+
+    updated = FONT_FACE_RE.sub(rewrite_face, original)
+    if updated != original:
+        css_path.write_text(updated, encoding="utf-8", errors="surrogateescape")
+        return True
+    return False
+
+
+def is_local_ref(ref: str) -> bool:
+    return bool(ref) and not ref.lower().startswith(("data:", "http:", "https:", "//", "/", "#"))
+
+
+def page_stylesheets(html_path: Path) -> List[Path]:
+    text = html_path.read_text(encoding="utf-8", errors="ignore")
+    sheets = []
+    for match in LINK_TAG_RE.finditer(text):
+        rel = LINK_REL_RE.search(match.group(0))
+        href = LINK_HREF_RE.search(match.group(0))
+        if rel and href and rel.group(2).strip().lower() == "stylesheet" and is_local_ref(href.group(2).strip()):
+            sheets.append(resolve_ref(html_path, href.group(2).strip()))
+    return sheets
+
+
+def localized_css_files(html_files: List[Path]) -> List[Path]:
+    """Return the stylesheets the pages load, following @import."""
+    pending = [sheet for path in html_files for sheet in page_stylesheets(path)]
+    found: Set[Path] = set()
+    while pending:
+        path = pending.pop()
+        if path in found or not path.is_file() or any(excluded in path.parents for excluded in CSS_EXCLUDE_DIRS):
+            continue
+        found.add(path)
+        css = path.read_text(encoding="utf-8", errors="ignore")
+        for match in CSS_IMPORT_RE.finditer(css):
+            if is_local_ref(match.group(2)):
+                pending.append(resolve_ref(path, match.group(2)))
+    return sorted(found)
+
+
+def main() -> int:
+    codepoints = collect_codepoints(HTML_FILES)
+    digest = charset_digest(codepoints)
+
+    # Rewriting is cheap when every subset already exists; only missing ones are built.
+    outputs: Dict[str, str] = {}
+    changed: List[str] = []
+    built: List[str] = []
+    try:
+        for css_path in localized_css_files(HTML_FILES):
+            if rewrite_css(css_path, codepoints, digest, outputs, built):
+                changed.append(css_path.relative_to(REPO_ROOT).as_posix())
+    except ImportError as exc:
+        print(f"font subsetting requires fonttools and brotli: {exc}", file=sys.stderr)
+        return 1
+
+    live = set(outputs.values())
+    for stale in SUBSET_DIR.glob("*.woff2"):
+        if stale.relative_to(REPO_ROOT).as_posix() not in live:
+            stale.unlink()
+
+    SUBSET_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "charset_sha256": digest,
+        "characters": "".join(chr(cp) for cp in sorted(codepoints)),
+        "fonts": dict(sorted(outputs.items())),
+    }
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    source_bytes = sum((REPO_ROOT / rel).stat().st_size for rel in outputs)
+    subset_bytes = sum((REPO_ROOT / rel).stat().st_size for rel in live)
+    print(
+        f"subset {len(outputs)} fonts to {len(codepoints)} codepoints, built {len(built)} "
+        f"({source_bytes} -> {subset_bytes} bytes); changed {len(changed)} css files"
+    )
+    for rel in changed:
+        print(rel)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+/* Generated by scripts/build_precache_manifest.py; do not edit. */
+'use strict';
+
+var PRECACHE_VERSION = '2b024d011d1cab6f';
+var MANIFEST_URL = 'assets/data/precache-manifest.json';
+var CACHE_PREFIX = 'vhc-precache-';
+var RUNTIME_CACHE = 'vhc-runtime';
+var MANIFEST_KEY = '__precache-manifest__';
+var MAX_RUNTIME_ENTRIES = 200;
+
+function precacheName(version) {
+  return CACHE_PREFIX + version;
+}
+
+function absoluteUrl(url) {
+  return new URL(url, self.location).toString();
+}
+
+function readStoredManifest(cache) {
+  return cache.match(absoluteUrl(MANIFEST_KEY)).then(function (response) {
+    return response ? response.json() : null;
+  });
+}
+
+function findPreviousPrecache(currentName) {
+  return caches.keys().then(function (names) {
+    var candidates = names.filter(function (name) {
+      return name.indexOf(CACHE_PREFIX) === 0 && name !== currentName;
+    });
+    if (!candidates.length) {
+      return null;
+    }
+    var name = candidates[candidates.length - 1];
+    return caches.open(name).then(function (cache) {
+      return readStoredManifest(cache).then(function (manifest) {
+        if (!manifest) {
+          return null;
+        }
+        var revisions = {};
+        manifest.entries.forEach(function (entry) {
+          revisions[entry.url] = entry.revision;
+        });
+        return { cache: cache, revisions: revisions };
+      });
+    });
+  });
+}
+
+function fetchInto(cache, url) {
+  return fetch(url, { cache: 'no-cache' }).then(function (response) {
+    if (!response.ok) {
+      throw new Error('Precache request failed: ' + url);
+    }
+    return cache.put(url, response);
+  });
+}
+
+function copyOrFetch(cache, previous, entry) {
+  var url = absoluteUrl(entry.url);
+  if (!previous || previous.revisions[entry.url] !== entry.revision) {
+    return fetchInto(cache, url);
+  }
+  return previous.cache.match(url).then(function (response) {
+    return response ? cache.put(url, response) : fetchInto(cache, url);
+  });
+}
+
+function installPrecache() {
+  var name = precacheName(PRECACHE_VERSION);
+  return fetch(MANIFEST_URL, { cache: 'no-cache' })
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error('Precache manifest request failed');
+      }
+      return response.json();
+    })
+    .then(function (manifest) {
+      return Promise.all([caches.open(name), findPreviousPrecache(name)]).then(function (opened) {
+        var cache = opened[0];
+        var previous = opened[1];
+        return Promise.all(
+          manifest.entries.map(function (entry) {
+            return copyOrFetch(cache, previous, entry);
+          })
+        ).then(function () {
+          var body = JSON.stringify(manifest);
+          return cache.put(absoluteUrl(MANIFEST_KEY), new Response(body, { headers: { 'Content-Type': 'application/json' } }));
+        });
+      });
+    });
+}
+
+function trimCache(cache, maxEntries) {
+  return cache.keys().then(function (keys) {
+    return Promise.all(
+      keys.slice(0, Math.max(0, keys.length - maxEntries)).map(function (key) {
+        return cache.delete(key);
+      })
+    );
+  });
+}
+
+function revalidate(cache, key, request, maxEntries) {
+  return fetch(request)
+    .then(function (response) {
+      if (!response.ok || response.type !== 'basic') {
+        return response;
+      }
+      return cache.put(key, response.clone()).then(function () {
+        return maxEntries ? trimCache(cache, maxEntries) : null;
+      }).then(function () {
+        return response;
+      });
+    })
+    .catch(function () {
+      return null;
+    });
+}
+
+function cacheKeyFor(request, url) {
+  if (request.mode !== 'navigate') {
+    return request;
+  }
+  // Ignore ?q= and similar so lessons open offline from any link.
+  var path = url.pathname.slice(-1) === '/' ? url.pathname + 'index.html' : url.pathname;
+  return url.origin + path;
+}
+
+function staleWhileRevalidate(event, request, url) {
+  var key = cacheKeyFor(request, url);
+  return caches.open(precacheName(PRECACHE_VERSION)).then(function (precache) {
+    return precache.match(key).then(function (cached) {
+      if (cached) {
+        event.waitUntil(revalidate(precache, key, request, 0));
+        return cached;
+      }
+      return caches.open(RUNTIME_CACHE).then(function (runtime) {
+        return runtime.match(key).then(function (runtimeCached) {
+          var network = revalidate(runtime, key, request, MAX_RUNTIME_ENTRIES);
+          if (runtimeCached) {
+            event.waitUntil(network);
+            return runtimeCached;
+          }
+          return network.then(function (response) {
+            return response || Response.error();
+          });
+        });
+      });
+    });
+  });
+}
+
+self.addEventListener('install', function (event) {
+  event.waitUntil(
+    installPrecache().then(function () {
+      return self.skipWaiting();
+    })
+  );
+});
+
+self.addEventListener('activate', function (event) {
+  var current = precacheName(PRECACHE_VERSION);
+  event.waitUntil(
+    caches
+      .keys()
+      .then(function (names) {
+        return Promise.all(
+          names
+            .filter(function (name) {
+              return name.indexOf(CACHE_PREFIX) === 0 && name !== current;
+            })
+            .map(function (name) {
+              return caches.delete(name);
+            })
+        );
+      })
+      .then(function () {
+        return self.clients.claim();
+      })
+  );
+});
+
+self.addEventListener('fetch', function (event) {
+  var request = event.request;
+  if (request.method !== 'GET' || request.headers.has('range')) {
+    return;
+  }
+  var url = new URL(request.url);
+  var scopePath = new URL(self.registration.scope).pathname;
+  if (url.origin !== self.location.origin || url.pathname.indexOf(scopePath + 'api/') === 0) {
+    return;
+  }
+  event.respondWith(staleWhileRevalidate(event, request, url));
+});
@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from build_css_bundles import rebase_css  # noqa: E402
+
+
+def test_rebase_css_skips_quoted_data_uri_with_inner_url():
+    svg = (
+        "data:image/svg+xml;utf8,<svg xmlns='http://www.w3.org/2000/svg'>"
+        "<defs><mask id='check'><rect/></mask></defs>"
+        "<rect mask='url(%23check)'/></svg>"
+    )
+    css = f'.box{{mask:url("{svg}");background:url(img/a.png)}}'
+    source_dir = Path("/site/assets/vendor/css")
+    target_dir = Path("/site/assets/css/bundles")
+
+    rebased = rebase_css(css, source_dir, target_dir)
+
+    assert f'url("{svg}")' in rebased
+    assert "url(../../vendor/css/img/a.png)" in rebased
+
+
+def test_rebase_css_leaves_strings_and_comments_alone():
+    css = '/* url(a.png) */.x{content:"url(b.png)";background:url( \'c.png\' )}'
+
+    rebased = rebase_css(css, Path("/site/src"), Path("/site/out"))
+
+    assert rebased.startswith('/* url(a.png) */.x{content:"url(b.png)"')
+    assert rebased.endswith("background:url('../src/c.png')}")